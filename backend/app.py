@@ -1,25 +1,15 @@
 from fastapi import FastAPI
-from db import Base, engine
-from routes import auth, checkin, survey, quick_thought, dashboard, alerts, connections
+import threading
+from routes import auth, checkin, survey, quick_thought, dashboard, alerts, connections, health, metrics
+from config import MODEL_WARMUP
+from utils.inference_client import warmup, expect_models, api_models
+from utils.retention import start_sweeper
+from utils.uploads import UploadSizeLimit
 import models   
 from fastapi.middleware.cors import CORSMiddleware
 
-Base.metadata.create_all(bind=engine)
-
-# Safe migration: add mood_entry_id to alerts table if it doesn't exist yet
-# (create_all never adds columns to existing tables in PostgreSQL)
-with engine.connect() as conn:
-    try:
-        conn.execute(
-            __import__("sqlalchemy").text(
-                "ALTER TABLE alerts ADD COLUMN IF NOT EXISTS mood_entry_id INTEGER "
-                "REFERENCES mood_entries(id) ON DELETE SET NULL"
-            )
-        )
-        conn.commit()
-    except Exception:
-        conn.rollback()  # column may already exist or DB may not support IF NOT EXISTS
-
+# The schema is managed by Alembic (backend/migrations); run `alembic upgrade head`
+# once per deploy, before starting the API. Nothing is created or altered at import.
 
 app = FastAPI(title="Nexis Backend", version="1.0.0")
 
@@ -28,6 +18,9 @@ origins = [
     "http://127.0.0.1:5173",
 ]
 
+# 413 for oversized uploads before the multipart body is spooled to disk
+# (added first so CORS, the outer layer, still decorates the 413)
+app.add_middleware(UploadSizeLimit)
 
 app.add_middleware(
     CORSMiddleware,
@@ -44,6 +37,30 @@ app.include_router(quick_thought.router)
 app.include_router(dashboard.router)
 app.include_router(alerts.router)
 app.include_router(connections.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
+
+
+@app.on_event("startup")
+def warm_models():
+    # Warm in a thread so the server starts accepting requests right away;
+    # /health/ready reports 503 until every scheduled model has run its dummy
+    # pass. Only the models this process runs are warmed: none with
+    # INFERENCE_SERVER, the text-only check-in's with ANALYSIS_MODE=queue.
+    names = api_models()
+    if MODEL_WARMUP != "background":
+        # Lazy: nothing is scheduled, so readiness must not wait for first requests
+        names = []
+    if names is not None:
+        expect_models(names)
+    if names != []:
+        threading.Thread(target=warmup, args=(names,), name="model-warmup", daemon=True).start()
+
+
+@app.on_event("startup")
+def start_media_retention():
+    # Reaps idle upload sessions; compacts / drops analyzed videos per MEDIA_RETENTION
+    start_sweeper(checkin.UPLOAD_DIR)
 
 @app.get("/")
 def root():
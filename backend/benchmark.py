@@ -0,0 +1,358 @@
+# backend/benchmark.py
+"""
+Benchmark the check-in inference pipeline on synthetic videos.
+
+    python benchmark.py                                   # stub models, default media matrix
+    python benchmark.py --models real --repeats 3
+    python benchmark.py --durations 5 30 --sizes 640x480 --compare benchmarks/results/old.json
+    python benchmark.py --models real --check-batching    # batched == solo audio embeddings
+
+Test videos are generated locally with ffmpeg (`testsrc2` video + `sine`
+audio) for every duration x resolution. Each video goes through the same
+stages as predict_emotion (decode, transcription, audio, face, text,
+meta-classifier, plus the whole end-to-end call), and every stage reports
+wall time, CPU time and peak RSS. `--models stub` swaps Whisper and the
+three HF encoders for tiny random stand-ins with the same interfaces, so
+the run needs no downloads and isolates the pipeline's own overhead.
+Results are written as JSON, tagged with the git commit, for comparison
+across commits. `--check-batching` instead encodes audio clips of
+different lengths one window at a time and all in one batch, and exits
+with status 1 unless every clip gets the same embedding both ways.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+from types import SimpleNamespace
+
+# Measure the pipeline itself: no cached stages, no cross-request batching delay
+os.environ.setdefault("INFERENCE_CACHE", "false")
+os.environ.setdefault("INFERENCE_BATCHING", "false")
+
+import numpy as np
+import torch
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+MEDIA_DIR = os.path.join("benchmarks", "media")
+STAGES = ("decode", "transcription", "audio", "face", "text", "meta", "end_to_end")
+
+
+# ---------------------------------------------------------------------------
+# Synthetic media
+# ---------------------------------------------------------------------------
+
+def make_video(duration, size, out_dir=MEDIA_DIR):
+    """testsrc2 + 440 Hz sine clip; reused if it already exists."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"testsrc_{size}_{duration:g}s.mp4")
+    if os.path.exists(path):
+        return path
+    cmd = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate=30:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest", path,
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Stub models (same call signatures as the real ones, random weights)
+# ---------------------------------------------------------------------------
+
+class _StubWhisper:
+    def transcribe(self, audio, **options):
+        return {"text": "this is a synthetic benchmark transcript"}
+
+
+class _StubTextTokenizer:
+    def __call__(self, texts, return_tensors="pt", truncation=True, padding=True):
+        from transformers import BatchEncoding
+        ids = [[zlib.crc32(w.encode()) % 1000 for w in (t or " ").split()][:128] or [0] for t in texts]
+        width = max(len(i) for i in ids)
+        return BatchEncoding({"input_ids": torch.tensor([i + [0] * (width - len(i)) for i in ids])})
+
+
+class _StubTextModel(torch.nn.Module):
+    LABELS = ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"]
+
+    def __init__(self):
+        super().__init__()
+        self.embed = torch.nn.EmbeddingBag(1000, 32)
+        self.head = torch.nn.Linear(32, len(self.LABELS))
+        self.config = SimpleNamespace(id2label=dict(enumerate(self.LABELS)))
+
+    def forward(self, input_ids):
+        return SimpleNamespace(logits=self.head(self.embed(input_ids)))
+
+
+class _StubImageProcessor:
+    def __call__(self, images, return_tensors="pt"):
+        from transformers import BatchFeature
+        arr = np.stack([np.asarray(img.convert("RGB"), dtype=np.float32) / 255.0 for img in images])
+        return BatchFeature({"pixel_values": torch.from_numpy(arr).permute(0, 3, 1, 2)})
+
+
+class _StubFaceModel(torch.nn.Module):
+    LABELS = ["angry", "disgust", "fearful", "happy", "neutral", "sad", "surprise"]
+
+    def __init__(self):
+        super().__init__()
+        self.conv = torch.nn.Conv2d(3, 8, kernel_size=8, stride=8)
+        self.head = torch.nn.Linear(8, len(self.LABELS))
+        self.config = SimpleNamespace(id2label=dict(enumerate(self.LABELS)))
+
+    def forward(self, pixel_values):
+        return SimpleNamespace(logits=self.head(self.conv(pixel_values).mean(dim=(2, 3))))
+
+
+class _StubAudioProcessor:
+    def __call__(self, waveforms, sampling_rate=16000, return_tensors="pt", padding=True):
+        width = max(len(w) for w in waveforms)
+        batch = np.zeros((len(waveforms), width), dtype=np.float32)
+        for i, w in enumerate(waveforms):
+            batch[i, :len(w)] = w
+        return {"input_values": torch.from_numpy(batch)}
+
+
+class _StubAudioModel(torch.nn.Module):
+    # One conv with wav2vec2's overall 400-sample receptive field / 320 hop
+    def __init__(self):
+        super().__init__()
+        self.conv = torch.nn.Conv1d(1, 16, kernel_size=400, stride=320)
+        self.config = SimpleNamespace(conv_kernel=(400,), conv_stride=(320,))
+
+    def forward(self, input_values):
+        return SimpleNamespace(last_hidden_state=self.conv(input_values.unsqueeze(1)).transpose(1, 2))
+
+
+def install_stub_models(pe):
+    """Re-registers whisper/face/audio/text with stand-ins; the meta-classifier stays real."""
+    torch.manual_seed(0)
+    pe.registry.register("whisper", lambda: _StubWhisper(), warmup=pe._warmup_whisper)
+    pe.registry.register("face", lambda: (_StubImageProcessor(), _StubFaceModel().eval()), warmup=pe._warmup_face)
+    pe.registry.register("audio", lambda: (_StubAudioProcessor(), _StubAudioModel().eval()), warmup=pe._warmup_audio)
+    pe.registry.register("text", lambda: (_StubTextTokenizer(), _StubTextModel().eval()), warmup=pe._warmup_text)
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+class _PeakRss:
+    """Samples RSS every few ms while a stage runs (ru_maxrss can't be reset per stage)."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = _rss_bytes()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def __enter__(self):
+        if self.start is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._sample()
+
+
+def measure(fn):
+    """Runs fn() and returns (result, {wall_ms, cpu_ms, peak_rss_mb, rss_growth_mb})."""
+    with _PeakRss() as rss:
+        wall, cpu = time.perf_counter(), time.process_time()
+        result = fn()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    def mb(n):
+        return round(n / (1024 * 1024), 1) if n is not None else None
+
+    return result, {
+        "wall_ms": round(wall * 1000, 2),
+        "cpu_ms": round(cpu * 1000, 2),
+        "peak_rss_mb": mb(rss.peak),
+        "rss_growth_mb": mb(rss.peak - rss.start) if rss.start is not None else None,
+    }
+
+
+def run_pipeline(pe, video_path):
+    """One pass over every stage, in predict_emotion's order."""
+    timings = {}
+    media, timings["decode"] = measure(lambda: pe.decode_media(video_path))
+    transcript, timings["transcription"] = measure(lambda: pe.transcribe_media(media))
+    text_input = transcript or "I had an ordinary day."
+
+    audio_raw, timings["audio"] = measure(lambda: pe.predict_audio(media.waveform))
+    video_raw, timings["face"] = measure(lambda: pe._average_frames(pe.predict_frames(media.frames)))
+    text_raw, timings["text"] = measure(lambda: pe.predict_text(text_input))
+
+    outputs = {
+        "video": pe.renormalize(pe.normalize_probs(video_raw, pe.video_map)),
+        "audio": pe.renormalize(audio_raw),
+        "text": pe.renormalize(pe.normalize_probs(text_raw, pe.text_map)),
+    }
+    _, timings["meta"] = measure(lambda: pe._classify(pe.feature_vector(outputs)))
+    _, timings["end_to_end"] = measure(lambda: pe.predict_emotion(video_path, ""))
+
+    return timings, {"duration_s": round(media.duration, 2), "frames": len(media.frames)}
+
+
+def summarize(runs):
+    """Median wall/CPU and max RSS per stage across repeats."""
+    out = {}
+    for stage in STAGES:
+        samples = [r[stage] for r in runs]
+        rss = [s["peak_rss_mb"] for s in samples if s["peak_rss_mb"] is not None]
+        growth = [s["rss_growth_mb"] for s in samples if s["rss_growth_mb"] is not None]
+        out[stage] = {
+            "wall_ms": round(float(np.median([s["wall_ms"] for s in samples])), 2),
+            "wall_ms_min": min(s["wall_ms"] for s in samples),
+            "cpu_ms": round(float(np.median([s["cpu_ms"] for s in samples])), 2),
+            "peak_rss_mb": max(rss) if rss else None,
+            "rss_growth_mb": max(growth) if growth else None,
+        }
+    return out
+
+
+def check_audio_batching(pe, durations=(3, 10, 25)) -> bool:
+    """Batched and solo audio embeddings must match for clips of different lengths."""
+    rng = np.random.default_rng(0)
+    clips = [(rng.standard_normal(int(d * 16000)) * 0.1).astype(np.float32) for d in durations]
+    windows = [pe.audio_windows(c) for c in clips]
+    batched = pe._run_audio_batch([w for ws in windows for w in ws])
+
+    ok, i = True, 0
+    for d, ws in zip(durations, windows):
+        solo = pe.pool_audio_stats([pe._run_audio_batch([w])[0] for w in ws])
+        together = pe.pool_audio_stats(batched[i:i + len(ws)])
+        i += len(ws)
+        a = np.array([solo[k] for k in solo])
+        b = np.array([together[k] for k in solo])
+        same = np.allclose(a, b, rtol=1e-4, atol=1e-5)
+        ok &= same
+        print(f"{'✅' if same else '❌'} {d:g}s clip ({len(ws)} windows) max diff {np.abs(a - b).max():.2e}")
+    return ok
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, check=True)
+        return out.stdout.decode().strip()
+    except Exception:
+        return None
+
+
+def print_comparison(report, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {v["name"]: v["stages"] for v in baseline.get("videos", [])}
+    print(f"\nvs {baseline_path} (commit {baseline.get('commit')}): wall-time ratio new/old")
+    for video in report["videos"]:
+        if video["name"] not in old:
+            continue
+        ratios = []
+        for stage in STAGES:
+            before = old[video["name"]].get(stage, {}).get("wall_ms")
+            after = video["stages"][stage]["wall_ms"]
+            if before:
+                ratios.append(f"{stage}={after / before:.2f}x")
+        print(f"  {video['name']:<28} {' '.join(ratios)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the inference pipeline on synthetic videos")
+    parser.add_argument("--models", choices=("stub", "real"), default="stub")
+    parser.add_argument("--durations", type=float, nargs="+", default=[5, 15, 30])
+    parser.add_argument("--sizes", nargs="+", default=["640x480", "1280x720"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--out", help="report path (default: benchmarks/results/<commit>-<models>.json)")
+    parser.add_argument("--compare", help="earlier report to print wall-time ratios against")
+    parser.add_argument("--check-batching", action="store_true",
+                        help="only check batched audio embeddings equal solo ones, then exit")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    import utils.predict_emotion as pe
+    if args.models == "stub":
+        install_stub_models(pe)
+
+    if args.check_batching:
+        sys.exit(0 if check_audio_batching(pe) else 1)
+
+    videos = [make_video(d, s) for s in args.sizes for d in args.durations]
+
+    start = time.perf_counter()
+    pe.registry.warmup()
+    warmup_seconds = round(time.perf_counter() - start, 3)
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.utcnow().isoformat(),
+        "models": args.models,
+        "backend": pe.INFERENCE_BACKEND,
+        "device": str(pe.device),
+        "torch_threads": torch.get_num_threads(),
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "repeats": args.repeats,
+        "warmup_seconds": warmup_seconds,
+        "model_load": pe.registry.status(),
+        "videos": [],
+    }
+
+    for path in videos:
+        runs, info = [], {}
+        for _ in range(args.repeats):
+            timings, info = run_pipeline(pe, path)
+            runs.append(timings)
+        name = os.path.splitext(os.path.basename(path))[0]
+        report["videos"].append({"name": name, "path": path, **info, "stages": summarize(runs)})
+
+        stages = report["videos"][-1]["stages"]
+        cols = " ".join(f"{s}={stages[s]['wall_ms']:.0f}ms" for s in STAGES)
+        print(f"{name:<28} {cols} peak={max(v['peak_rss_mb'] or 0 for v in stages.values())}MB")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = args.out or os.path.join(RESULTS_DIR, f"{commit or 'local'}-{args.models}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ report written to {out_path}")
+
+    if args.compare:
+        print_comparison(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
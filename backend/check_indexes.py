@@ -0,0 +1,176 @@
+# backend/check_indexes.py
+"""
+EXPLAIN the hot queries and check each one is served by its index.
+
+    python check_indexes.py                          # against the configured DB as it is
+    python check_indexes.py --seed 10000000          # fill a SCRATCH DB first, then check
+
+Every per-user route query and the queue / retention scans are compiled
+from the same SQLAlchemy expressions the app uses and run through
+`EXPLAIN (FORMAT JSON)`. A check passes when the plan reads its table
+through the expected index (Index Scan, Index Only Scan or Bitmap Index
+Scan) and never through a Seq Scan. On a nearly empty database the
+planner rightly prefers sequential scans, so `--seed N` first inserts N
+synthetic mood entries (plus proportional users, alerts, quick thoughts
+and surveys) with generate_series and runs ANALYZE. Only seed a
+throwaway database: the rows are not cleaned up.
+Exits with status 1 if any check fails.
+"""
+import argparse
+import enum
+import json
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import desc, func, text
+from sqlalchemy.orm import Session
+
+import models
+from db import engine
+from utils.job_queue import _claimable
+from utils.retention import _analyzed_with_video
+
+SEED_EMAIL_DOMAIN = "seed.invalid"
+SCAN_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def seed(conn, entries: int) -> None:
+    """Synthetic rows: ~1000 entries per user, 1% pending, 10% of analyzed still holding a video."""
+    users = max(1, entries // 1000)
+    print(f"Seeding {users:,} users and {entries:,} mood entries…")
+    conn.execute(text(f"""
+        INSERT INTO users (name, email, password_hash, role)
+        SELECT 'seed ' || i, 'seed-' || i || '@{SEED_EMAIL_DOMAIN}', 'x', 'user'
+        FROM generate_series(1, :users) AS i
+        ON CONFLICT (email) DO NOTHING
+    """), {"users": users})
+    conn.execute(text(f"""
+        CREATE TEMP TABLE seed_users AS
+        SELECT row_number() OVER (ORDER BY id) AS n, id FROM users
+        WHERE email LIKE '%@{SEED_EMAIL_DOMAIN}'
+    """))
+    conn.execute(text("""
+        INSERT INTO mood_entries (user_id, emotion, confidence, status, video_path, created_at, attempts)
+        SELECT u.id,
+               CASE WHEN r < 0.98 THEN 'neutral' END,
+               CASE WHEN r < 0.98 THEN 70.0 END,
+               CAST(CASE WHEN r < 0.98 THEN 'analyzed' WHEN r < 0.99 THEN 'uploaded' ELSE 'failed' END
+                    AS entrystatus),
+               CASE WHEN r < 0.098 OR r >= 0.98 THEN 'uploads/seed.webm' END,
+               now() - random() * interval '365 days',
+               0
+        FROM (SELECT i, random() AS r FROM generate_series(1, :entries) AS i) s
+        JOIN seed_users u ON u.n = 1 + (s.i % :users)
+    """), {"entries": entries, "users": users})
+    for table, extra_cols, extra_vals, per in (
+        ("alerts", "alert_type, description, status, urgency",
+         "'Negative Emotion Detected', 'seed', "
+         "CAST(CASE WHEN random() < 0.1 THEN 'new' ELSE 'acknowledged' END AS alertstatus), "
+         "CAST('medium' AS alerturgency)", 10),
+        ("quick_thoughts", "text_content, sentiment_score", "'seed', 0.0", 10),
+        ("surveys_results", "score, interpretation", "5, 'Mild'", 100),
+    ):
+        conn.execute(text(f"""
+            INSERT INTO {table} (owner_id, created_at, {extra_cols})
+            SELECT u.id, now() - random() * interval '365 days', {extra_vals}
+            FROM generate_series(1, :rows) AS i
+            JOIN seed_users u ON u.n = 1 + (i % :users)
+        """), {"rows": max(1, entries // per), "users": users})
+    conn.commit()
+    for table in ("users", "mood_entries", "alerts", "quick_thoughts", "surveys_results"):
+        conn.execute(text(f"ANALYZE {table}"))
+    conn.commit()
+
+
+def hot_queries(db: Session, user_id: int):
+    """(name, table, expected index, query) for every query the indexes exist for."""
+    now = datetime.utcnow()
+    M, A = models.MoodEntry, models.Alert
+    return [
+        ("check-in history page", "mood_entries", "ix_mood_entries_user_created",
+         db.query(M).filter(M.user_id == user_id).order_by(M.created_at.desc(), M.id.desc()).limit(50)),
+        ("dashboard recent check-ins", "mood_entries", "ix_mood_entries_user_created",
+         db.query(M).filter(M.user_id == user_id).order_by(desc(M.created_at)).limit(5)),
+        ("14-day aggregation", "mood_entries", "ix_mood_entries_user_created",
+         db.query(M).filter(M.user_id == user_id).filter(M.created_at >= now - timedelta(days=14))),
+        ("alert backfill scan", "mood_entries", "ix_mood_entries_user_created",
+         db.query(M).filter(M.user_id == user_id, M.emotion.isnot(None),
+                            M.status == models.EntryStatus.analyzed)),
+        ("job-queue claim", "mood_entries", "ix_mood_entries_pending",
+         _claimable(db.query(M), now).order_by(M.created_at).with_for_update(skip_locked=True).limit(1)),
+        ("bulk pending scan", "mood_entries", "ix_mood_entries_pending",
+         _claimable(db.query(M.id), now).order_by(M.created_at)),
+        ("media retention sweep", "mood_entries", "ix_mood_entries_with_video",
+         _analyzed_with_video(db).filter(M.created_at < now - timedelta(hours=24))
+         .order_by(M.created_at).limit(20)),
+        ("alerts page", "alerts", "ix_alerts_owner_created",
+         db.query(A).filter(A.owner_id == user_id).order_by(A.created_at.desc())),
+        ("unacknowledged alert count", "alerts", "ix_alerts_owner_new",
+         db.query(func.count()).select_from(A)
+         .filter(A.owner_id == user_id, A.status == models.AlertStatus.new)),
+        ("latest quick thought", "quick_thoughts", "ix_quick_thoughts_owner_created",
+         db.query(models.QuickThought).filter(models.QuickThought.owner_id == user_id)
+         .order_by(desc(models.QuickThought.created_at)).limit(1)),
+        ("weekly report surveys", "surveys_results", "ix_surveys_results_owner_created",
+         db.query(models.SurveyResult).filter(models.SurveyResult.owner_id == user_id)
+         .filter(models.SurveyResult.created_at >= now - timedelta(days=7))
+         .order_by(models.SurveyResult.created_at.desc())),
+    ]
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def explain(conn, query):
+    statement = getattr(query, "statement", query)
+    compiled = statement.compile(dialect=engine.dialect)
+    # Enum columns store the member name; the driver only sees the raw parameters
+    params = {k: v.name if isinstance(v, enum.Enum) else v for k, v in compiled.params.items()}
+    row = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), params).scalar()
+    plan = row if isinstance(row, list) else json.loads(row)
+    return list(_plan_nodes(plan[0]["Plan"]))
+
+
+def check(table, index, nodes):
+    seq = [n for n in nodes if n["Node Type"] == "Seq Scan" and n.get("Relation Name") == table]
+    used = [n for n in nodes if n["Node Type"] in SCAN_NODES and n.get("Index Name") == index]
+    if seq:
+        return False, "Seq Scan"
+    if not used:
+        other = sorted({n.get("Index Name") for n in nodes if n["Node Type"] in SCAN_NODES} - {None})
+        return False, f"uses {', '.join(other) or 'no index'}"
+    return True, used[0]["Node Type"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the hot queries use their indexes")
+    parser.add_argument("--seed", type=int, default=0, metavar="N",
+                        help="insert N synthetic mood entries first (scratch databases only)")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        if args.seed:
+            seed(conn, args.seed)
+        rows = conn.execute(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'mood_entries'")).scalar()
+        user_id = conn.execute(text("SELECT user_id FROM mood_entries ORDER BY id DESC LIMIT 1")).scalar()
+        if user_id is None:
+            sys.exit("mood_entries is empty; run with --seed N on a scratch database.")
+        print(f"mood_entries ≈ {rows:,} rows, checking as user {user_id}\n")
+
+        failures = 0
+        with Session(bind=conn) as db:
+            for name, table, index, query in hot_queries(db, user_id):
+                ok, detail = check(table, index, explain(conn, query))
+                failures += not ok
+                print(f"{'✅' if ok else '❌'} {name:<28} {index:<34} {detail}")
+
+    if failures:
+        print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} not served by their index.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
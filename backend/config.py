@@ -20,4 +20,63 @@ DATABASE_URL = f"postgresql+psycopg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{D
 
 # We must check that all critical keys are loaded
 if not SECRET_KEY or not ALGORITHM or not DATABASE_URL:
-    raise ValueError("Missing critical environment variables. Check your .env file.")
\ No newline at end of file
+    raise ValueError("Missing critical environment variables. Check your .env file.")
+
+# Model warmup: "background" loads + warms every model in a thread at startup
+# (readiness flips once done), "lazy" loads each model on its first request.
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "background").lower()
+
+
+# Where check-in analysis runs: "background" (the analysis governor's thread
+# pool in the API process, see utils/governor.py) or "queue" (left as
+# `uploaded` for `python worker.py`).
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "background").lower()
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Bulk reprocessing of pending check-ins (POST /check-in/process-pending)
+BULK_PROCESSES = int(os.getenv("BULK_PROCESSES", str(os.cpu_count() or 1)))
+BULK_COMMIT_SIZE = int(os.getenv("BULK_COMMIT_SIZE", "25"))
+
+# Weekly report insights: "llm" (Groq, blocking), "local" (rule-based, instant)
+# or "hybrid" (local now, LLM refinement written back in the background).
+INSIGHTS_MODE = os.getenv("INSIGHTS_MODE", "llm").lower()
+
+# Concurrency governor for in-process analyses (ANALYSIS_MODE=background):
+# at most ANALYSIS_CONCURRENCY run at once, each with cores / slots torch
+# threads; /check-in/multimodal returns 429 once ANALYSIS_MAX_BACKLOG wait.
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", str(max(1, (os.cpu_count() or 1) // 4))))
+ANALYSIS_MAX_BACKLOG = int(os.getenv("ANALYSIS_MAX_BACKLOG", "32"))
+# Text-only check-ins (/check-in/text) run on their own lane of slots with
+# their own backlog, never behind queued video analyses.
+ANALYSIS_TEXT_SLOTS = int(os.getenv("ANALYSIS_TEXT_SLOTS", "1"))
+ANALYSIS_TEXT_MAX_BACKLOG = int(os.getenv("ANALYSIS_TEXT_MAX_BACKLOG", "64"))
+
+# Shared inference server (python inference_server.py): "unix:/path.sock" or
+# "http://127.0.0.1:8100". Empty = every process loads the models itself.
+INFERENCE_SERVER = os.getenv("INFERENCE_SERVER", "").strip()
+INFERENCE_SERVER_TIMEOUT = float(os.getenv("INFERENCE_SERVER_TIMEOUT", "600"))
+
+# Upload limits, checked while streaming / by ffprobe before a MoodEntry exists
+MAX_UPLOAD_MB = float(os.getenv("MAX_UPLOAD_MB", "200"))
+MAX_VIDEO_SECONDS = float(os.getenv("MAX_VIDEO_SECONDS", "600"))
+
+# Chunked upload sessions (POST /check-in/uploads): open sessions per user and
+# across the API (429 above either), the largest single PUT, and minutes
+# without a chunk before the sweeper removes a session and stops its decoder.
+UPLOAD_SESSIONS_PER_USER = int(os.getenv("UPLOAD_SESSIONS_PER_USER", "2"))
+UPLOAD_SESSIONS_MAX = int(os.getenv("UPLOAD_SESSIONS_MAX", "32"))
+UPLOAD_CHUNK_MAX_MB = float(os.getenv("UPLOAD_CHUNK_MAX_MB", "16"))
+UPLOAD_SESSION_IDLE_MINUTES = float(os.getenv("UPLOAD_SESSION_IDLE_MINUTES", "5"))
+
+# Media retention for analyzed check-ins (background sweeper in the API):
+# "off", "proxy" (transcode to a small 240p proxy) or "drop" (delete the
+# video, keep the results) once older than MEDIA_COMPACT_AFTER_HOURS.
+# MEDIA_DROP_AFTER_DAYS / MEDIA_QUOTA_MB (0 = disabled) delete videos by
+# age or, oldest first, while uploads/ is over quota.
+MEDIA_RETENTION = os.getenv("MEDIA_RETENTION", "off").lower()
+MEDIA_COMPACT_AFTER_HOURS = float(os.getenv("MEDIA_COMPACT_AFTER_HOURS", "24"))
+MEDIA_DROP_AFTER_DAYS = float(os.getenv("MEDIA_DROP_AFTER_DAYS", "0"))
+MEDIA_QUOTA_MB = float(os.getenv("MEDIA_QUOTA_MB", "0"))
+MEDIA_SWEEP_INTERVAL_SECONDS = float(os.getenv("MEDIA_SWEEP_INTERVAL_SECONDS", "600"))
+MEDIA_SWEEP_BATCH = int(os.getenv("MEDIA_SWEEP_BATCH", "20"))
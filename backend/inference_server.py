@@ -0,0 +1,95 @@
+# backend/inference_server.py
+"""
+Local inference server that owns the models.
+
+    python inference_server.py --socket /tmp/nexis-inference.sock
+    python inference_server.py --host 127.0.0.1 --port 8100
+
+Loads Whisper, the face ViT, wav2vec2, DistilRoBERTa and the meta-model
+once and serves predict_emotion over a Unix socket (or local HTTP). Start
+the API and workers with INFERENCE_SERVER=unix:/tmp/nexis-inference.sock
+(or http://127.0.0.1:8100): they then import no models themselves and
+send only the uploaded video's file path, so any number of API workers
+share one copy of the model memory. Concurrent requests from all of them
+land in the same micro-batchers.
+"""
+import argparse
+import os
+import threading
+import traceback
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from utils.predict_emotion import predict_emotion, registry, batching_stats, cache_stats
+
+app = FastAPI(title="Nexis Inference Server", version="1.0.0")
+
+
+class PredictRequest(BaseModel):
+    video_path: Optional[str] = None
+    text_input: str = ""
+    transcript: Optional[str] = None
+
+
+@app.post("/predict")
+def predict(req: PredictRequest):
+    fresh = {}
+
+    def remember(text):
+        fresh["transcript"] = text
+
+    try:
+        return predict_emotion(
+            req.video_path, req.text_input, transcript=req.transcript, on_transcript=remember,
+        )
+    except Exception as e:
+        traceback.print_exc()
+        # Hand a fresh transcript back anyway so the caller can persist it
+        return JSONResponse(
+            status_code=400 if isinstance(e, ValueError) else 500,
+            content={"error": str(e), "transcript": fresh.get("transcript")},
+        )
+
+
+@app.get("/status")
+def status():
+    return {
+        "ready": registry.is_ready(),
+        "pid": os.getpid(),
+        "models": registry.status(),
+        "batching": batching_stats(),
+        "cache": cache_stats(),
+    }
+
+
+@app.on_event("startup")
+def warm_models():
+    threading.Thread(target=registry.warmup, name="model-warmup", daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nexis local inference server")
+    parser.add_argument("--socket", help="Unix socket path (preferred on one box)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (default: all cores)")
+    args = parser.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)  # stale socket from a previous run
+        uvicorn.run(app, uds=args.socket)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Baseline schema: the tables app.py used to create at import time
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-16
+
+Safe on both a fresh database and one created by the old
+create_all + SAFE_MIGRATIONS startup code: tables that already exist are
+left alone and the columns those ad-hoc ALTERs added are added only if
+missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Enum labels are the Python member names, as SQLAlchemy's Enum(...) stores them
+user_role = sa.Enum("user", "guardian", "doctor", name="userrole")
+entry_status = sa.Enum("uploaded", "analyzed", "failed", name="entrystatus")
+bulk_job_status = sa.Enum("running", "completed", "failed", name="bulkjobstatus")
+alert_status = sa.Enum("new", "acknowledged", name="alertstatus")
+alert_urgency = sa.Enum("low", "medium", "high", name="alerturgency")
+
+# Columns the old startup ALTERs added to tables that predate them
+LEGACY_COLUMNS = [
+    "ALTER TABLE alerts ADD COLUMN IF NOT EXISTS mood_entry_id INTEGER "
+    "REFERENCES mood_entries(id) ON DELETE SET NULL",
+    "ALTER TABLE mood_entries ADD COLUMN IF NOT EXISTS claimed_by VARCHAR",
+    "ALTER TABLE mood_entries ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITHOUT TIME ZONE",
+    "ALTER TABLE mood_entries ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE mood_entries ADD COLUMN IF NOT EXISTS transcript TEXT",
+    "ALTER TABLE mood_entries ADD COLUMN IF NOT EXISTS analysis_metrics JSON",
+    "ALTER TABLE mood_entries ADD COLUMN IF NOT EXISTS partial_probabilities JSON",
+    "ALTER TABLE mood_entries ADD COLUMN IF NOT EXISTS analysis_stage VARCHAR",
+]
+
+
+def _missing(name):
+    return not sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    if _missing("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("password_hash", sa.String(), nullable=False),
+            sa.Column("role", user_role, nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if _missing("surveys_results"):
+        op.create_table(
+            "surveys_results",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("score", sa.Integer(), nullable=False),
+            sa.Column("interpretation", sa.String()),
+            sa.Column("answers", sa.JSON()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        )
+        op.create_index("ix_surveys_results_id", "surveys_results", ["id"])
+
+    if _missing("mood_entries"):
+        op.create_table(
+            "mood_entries",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("emotion", sa.String()),
+            sa.Column("confidence", sa.Float()),
+            sa.Column("probabilities", sa.JSON()),
+            sa.Column("video_path", sa.String()),
+            sa.Column("text_input", sa.String()),
+            sa.Column("transcript", sa.Text()),
+            sa.Column("analysis_metrics", sa.JSON()),
+            sa.Column("partial_probabilities", sa.JSON()),
+            sa.Column("analysis_stage", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("status", entry_status),
+            sa.Column("analysis_error", sa.String()),
+            sa.Column("claimed_by", sa.String()),
+            sa.Column("lease_expires_at", sa.DateTime()),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index("ix_mood_entries_id", "mood_entries", ["id"])
+
+    if _missing("bulk_jobs"):
+        op.create_table(
+            "bulk_jobs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("submitted_by", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL")),
+            sa.Column("status", bulk_job_status, nullable=False),
+            sa.Column("total", sa.Integer(), nullable=False),
+            sa.Column("processed", sa.Integer(), nullable=False),
+            sa.Column("failed", sa.Integer(), nullable=False),
+            sa.Column("skipped", sa.Integer(), nullable=False),
+            sa.Column("workers", sa.Integer()),
+            sa.Column("error", sa.String()),
+            sa.Column("started_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+            sa.Column("finished_at", sa.DateTime()),
+        )
+        op.create_index("ix_bulk_jobs_id", "bulk_jobs", ["id"])
+
+    if _missing("quick_thoughts"):
+        op.create_table(
+            "quick_thoughts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("text_content", sa.Text(), nullable=False),
+            sa.Column("sentiment_score", sa.Float()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        )
+        op.create_index("ix_quick_thoughts_id", "quick_thoughts", ["id"])
+
+    if _missing("alerts"):
+        op.create_table(
+            "alerts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("alert_type", sa.String(), nullable=False),
+            sa.Column("description", sa.Text(), nullable=False),
+            sa.Column("status", alert_status, nullable=False),
+            sa.Column("urgency", alert_urgency, nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column(
+                "mood_entry_id", sa.Integer(),
+                sa.ForeignKey("mood_entries.id", ondelete="SET NULL"), unique=True,
+            ),
+        )
+        op.create_index("ix_alerts_id", "alerts", ["id"])
+        op.create_index("ix_alerts_alert_type", "alerts", ["alert_type"])
+        op.create_index("ix_alerts_status", "alerts", ["status"])
+
+    if _missing("weekly_reports"):
+        op.create_table(
+            "weekly_reports",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("period_start", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("period_end", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("payload", sa.JSON(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_weekly_reports_id", "weekly_reports", ["id"])
+        op.create_index(
+            "ix_weekly_reports_user_period", "weekly_reports", ["user_id", "period_start", "period_end"],
+        )
+
+    for statement in LEGACY_COLUMNS:
+        op.execute(statement)
+
+
+def downgrade():
+    for table in (
+        "weekly_reports", "alerts", "quick_thoughts", "bulk_jobs",
+        "mood_entries", "surveys_results", "users",
+    ):
+        op.drop_table(table)
+    for enum in (alert_urgency, alert_status, bulk_job_status, entry_status, user_role):
+        enum.drop(op.get_bind(), checkfirst=True)
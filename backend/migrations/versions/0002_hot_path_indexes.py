@@ -0,0 +1,48 @@
+"""Composite and partial indexes for the per-user and queue queries
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-16
+
+Built CONCURRENTLY so a large production table stays writable while the
+migration runs. `python check_indexes.py` verifies the planner uses them.
+"""
+from alembic import op
+
+revision = "0002_hot_path_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+# name -> (table, definition); enum literals are the stored member names
+INDEXES = {
+    # History, dashboard recent check-ins, 14-day aggregation, keyset pages
+    "ix_mood_entries_user_created": ("mood_entries", "(user_id, created_at, id)"),
+    # Job-queue claim and bulk pending scan: only the (small) pending set
+    "ix_mood_entries_pending": ("mood_entries", "(created_at) WHERE status = 'uploaded'"),
+    # Media retention sweep: analyzed entries that still hold a video
+    "ix_mood_entries_with_video": (
+        "mood_entries", "(created_at) WHERE status = 'analyzed' AND video_path IS NOT NULL",
+    ),
+    # Alerts page, newest first
+    "ix_alerts_owner_created": ("alerts", "(owner_id, created_at)"),
+    # Unacknowledged alert count and acknowledge-all
+    "ix_alerts_owner_new": ("alerts", "(owner_id) WHERE status = 'new'"),
+    "ix_quick_thoughts_owner_created": ("quick_thoughts", "(owner_id, created_at)"),
+    "ix_surveys_results_owner_created": ("surveys_results", "(owner_id, created_at)"),
+}
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, (table, definition) in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+        # A two-valued column on its own never beats a seq scan; ix_alerts_owner_new replaces it
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_alerts_status")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_alerts_status ON alerts (status)")
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -1,5 +1,5 @@
 #models.py
-from sqlalchemy import Column, Integer, String, Enum, DateTime, func, ForeignKey, JSON, Float, Text, Index
+from sqlalchemy import Column, Integer, String, Enum, DateTime, func, ForeignKey, JSON, Float, Text, Index, text
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from db import Base 
@@ -51,6 +51,10 @@ class SurveyResult(Base):
 
     owner = relationship("User", back_populates="surveys")
 
+    __table_args__ = (
+        Index("ix_surveys_results_owner_created", "owner_id", "created_at"),
+    )
+
 class MoodEntry(Base):
     __tablename__ = "mood_entries"
 
@@ -61,12 +65,56 @@ class MoodEntry(Base):
     probabilities = Column(JSON, nullable=True)       # null until analyzed
     video_path = Column(String, nullable=True)        # null for text-only entries
     text_input = Column(String, nullable=True)        # optional
+    transcript = Column(Text, nullable=True)          # Whisper output, kept so retries skip transcription
+    analysis_metrics = Column(JSON, nullable=True)    # per-stage timings (ms) + model versions of the analysis
+    # Provisional result while the analysis runs: meta-classifier probabilities from the
+    # modalities finished so far and the last one finished (text/audio/video); cleared when final
+    partial_probabilities = Column(JSON, nullable=True)
+    analysis_stage = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     owner = relationship("User", back_populates="mood_entries")
     status = Column(Enum(EntryStatus), default=EntryStatus.uploaded)
     analysis_error = Column(String, nullable=True)
 
+    # Job-queue lease: a worker owns an `uploaded` row until lease_expires_at,
+    # renewing it by heartbeat. Expired leases are picked up again.
+    claimed_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Created by migrations/versions/0002_hot_path_indexes.py
+    __table_args__ = (
+        Index("ix_mood_entries_user_created", "user_id", "created_at", "id"),
+        Index("ix_mood_entries_pending", "created_at", postgresql_where=text("status = 'uploaded'")),
+        Index(
+            "ix_mood_entries_with_video", "created_at",
+            postgresql_where=text("status = 'analyzed' AND video_path IS NOT NULL"),
+        ),
+    )
+
+class BulkJobStatus(str, enum.Enum):
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class BulkJob(Base):
+    """Progress of a bulk reprocessing run over pending check-ins."""
+    __tablename__ = "bulk_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    submitted_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    status = Column(Enum(BulkJobStatus), nullable=False, default=BulkJobStatus.running)
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)   # claimed by someone else meanwhile
+    workers = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
 class QuickThought(Base):
     __tablename__ = "quick_thoughts"
 
@@ -78,13 +126,17 @@ class QuickThought(Base):
 
     owner = relationship("User", back_populates="quick_thoughts")
 
+    __table_args__ = (
+        Index("ix_quick_thoughts_owner_created", "owner_id", "created_at"),
+    )
+
 class Alert(Base):
     __tablename__ = "alerts"
 
     id = Column(Integer, primary_key=True, index=True)
     alert_type = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=False)
-    status = Column(Enum(AlertStatus), nullable=False, default=AlertStatus.new, index=True)
+    status = Column(Enum(AlertStatus), nullable=False, default=AlertStatus.new)
     urgency = Column(Enum(AlertUrgency), nullable=False, default=AlertUrgency.medium)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -93,6 +145,11 @@ class Alert(Base):
 
     owner = relationship("User", back_populates="alerts")
 
+    __table_args__ = (
+        Index("ix_alerts_owner_created", "owner_id", "created_at"),
+        Index("ix_alerts_owner_new", "owner_id", postgresql_where=text("status = 'new'")),
+    )
+
 class WeeklyReport(Base):
     __tablename__ = "weekly_reports"
 
@@ -0,0 +1,178 @@
+# backend/optimize_models.py
+"""
+Export and compare optimized CPU encoders.
+
+    python optimize_models.py export
+    python optimize_models.py compare [--videos uploads/a.mp4 uploads/b.webm] [--repeats 5]
+
+`export` writes int8 PyTorch modules and fp32/int8 ONNX graphs for the
+face, audio and text encoders into metamodels/optimized/. `compare` runs
+every available backend on the same sample set and reports, per modality,
+the latency change and the output change against the fp32 PyTorch model.
+Select a backend for the API/workers with INFERENCE_BACKEND.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+from PIL import Image
+from transformers import (
+    AutoImageProcessor, AutoModelForImageClassification,
+    Wav2Vec2Processor, Wav2Vec2Model,
+    AutoTokenizer, AutoModelForSequenceClassification,
+)
+
+from utils.inference_backends import BACKENDS, OPTIMIZED_DIR, export_encoder, load_encoder
+from utils.predict_emotion import FACE_MODEL_ID, AUDIO_MODEL_ID, TEXT_MODEL_ID
+
+SAMPLE_TEXTS = [
+    "I feel great today, everything went well at work.",
+    "I'm so tired and nothing seems to matter anymore.",
+    "Why does this keep happening to me? It's so unfair!",
+    "I'm nervous about tomorrow's appointment.",
+    "It was a normal day, nothing special.",
+    "I can't believe I got the job!",
+    "That smell in the kitchen was revolting.",
+    "",
+]
+
+MODALITIES = {
+    "face": (FACE_MODEL_ID, AutoImageProcessor, AutoModelForImageClassification),
+    "audio": (AUDIO_MODEL_ID, Wav2Vec2Processor, Wav2Vec2Model),
+    "text": (TEXT_MODEL_ID, AutoTokenizer, AutoModelForSequenceClassification),
+}
+
+
+def build_samples(videos):
+    """Frames, waveforms and texts to compare on; synthetic when no videos are given."""
+    rng = np.random.default_rng(0)
+    frames, waveforms = [], []
+
+    if videos:
+        from utils.media import decode_media
+        for path in videos:
+            media = decode_media(path)
+            frames.extend(media.frames)
+            waveforms.append(media.waveform)
+    else:
+        frames = [
+            Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8))
+            for _ in range(8)
+        ]
+        for seconds in (3, 6, 12):
+            t = np.arange(seconds * 16000) / 16000
+            tone = 8000 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 500, t.shape)
+            waveforms.append(tone.astype(np.float32))
+
+    return {"face": frames, "audio": waveforms, "text": SAMPLE_TEXTS}
+
+
+def _inputs(name, processor, sample):
+    if name == "face":
+        return processor(images=[sample], return_tensors="pt")
+    if name == "audio":
+        return processor([sample], sampling_rate=16000, return_tensors="pt", padding=True)
+    return processor([sample], return_tensors="pt", truncation=True, padding=True)
+
+
+def _output_vector(name, out):
+    if name == "audio":
+        hidden = out.last_hidden_state[0]
+        return torch.cat([hidden.mean(dim=0), hidden.std(dim=0)]).numpy()
+    return torch.nn.functional.softmax(out.logits, dim=-1)[0].numpy()
+
+
+def run_export(args):
+    samples = build_samples(None)
+    for name, (model_id, proc_cls, model_cls) in MODALITIES.items():
+        processor = proc_cls.from_pretrained(model_id)
+        sample_inputs = dict(_inputs(name, processor, samples[name][0]))
+        for path in export_encoder(name, model_id, model_cls, sample_inputs):
+            print(f"✅ wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+def run_compare(args):
+    torch.set_num_threads(args.threads or torch.get_num_threads())
+    samples = build_samples(args.videos)
+    report = {"threads": torch.get_num_threads(), "modalities": {}}
+
+    for name, (model_id, proc_cls, model_cls) in MODALITIES.items():
+        processor = proc_cls.from_pretrained(model_id)
+        prepared = [_inputs(name, processor, s) for s in samples[name]]
+        results, reference = {}, None
+
+        for backend in BACKENDS:
+            try:
+                model = load_encoder(name, model_id, model_cls, backend=backend)
+            except Exception as e:
+                results[backend] = {"error": str(e)}
+                continue
+
+            outputs, timings = [], []
+            with torch.no_grad():
+                for inputs in prepared:
+                    model(**inputs)  # warm
+                    start = time.perf_counter()
+                    for _ in range(args.repeats):
+                        out = model(**inputs)
+                    timings.append((time.perf_counter() - start) / args.repeats)
+                    outputs.append(_output_vector(name, out))
+
+            entry = {"mean_latency_ms": round(float(np.mean(timings)) * 1000, 2)}
+            if reference is None:
+                reference = (outputs, entry["mean_latency_ms"])
+            else:
+                ref_outputs, ref_latency = reference
+                diffs = [np.abs(a - b) for a, b in zip(outputs, ref_outputs)]
+                entry["speedup"] = round(ref_latency / entry["mean_latency_ms"], 2)
+                entry["mean_abs_diff"] = round(float(np.mean([d.mean() for d in diffs])), 6)
+                entry["max_abs_diff"] = round(float(np.max([d.max() for d in diffs])), 6)
+                if name == "audio":
+                    cos = [
+                        float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+                        for a, b in zip(outputs, ref_outputs)
+                    ]
+                    entry["min_cosine"] = round(min(cos), 6)
+                else:
+                    agree = [int(np.argmax(a) == np.argmax(b)) for a, b in zip(outputs, ref_outputs)]
+                    entry["top1_agreement"] = round(float(np.mean(agree)), 3)
+            results[backend] = entry
+
+        report["modalities"][name] = {"samples": len(prepared), "backends": results}
+
+    os.makedirs(OPTIMIZED_DIR, exist_ok=True)
+    out_path = args.out or os.path.join(OPTIMIZED_DIR, "comparison_report.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, data in report["modalities"].items():
+        print(f"\n{name} ({data['samples']} samples)")
+        for backend, entry in data["backends"].items():
+            print(f"  {backend:<11} {json.dumps(entry)}")
+    print(f"\n✅ report written to {out_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and compare optimized CPU encoders")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("export", help="write int8 / ONNX artifacts to metamodels/optimized/")
+
+    compare = sub.add_parser("compare", help="latency + output-change report per modality")
+    compare.add_argument("--videos", nargs="*", help="sample videos (default: synthetic inputs)")
+    compare.add_argument("--repeats", type=int, default=5)
+    compare.add_argument("--threads", type=int, default=0)
+    compare.add_argument("--out", help="report path (default: metamodels/optimized/comparison_report.json)")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        run_export(args)
+    else:
+        run_compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,29 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, UploadFile, HTTPException, status as http_status
-from sqlalchemy.orm import Session
+import asyncio
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, File, Form, UploadFile, HTTPException, Query, Request, status as http_status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session, load_only
 from db import get_db, SessionLocal
-import models, uuid, os
-from utils.security import get_current_user
-from utils.predict_emotion import predict_emotion
+import models, os
+from utils.security import get_current_user, oauth2_scheme
+from utils.inference_client import predict_emotion
+from utils.analysis import apply_result, run_claimed_job, store_failure
+from utils.events import status_stream, provisional_fields
+from schemas import TextCheckInCreate, UploadSessionCreate, UploadSessionFinalize
+from utils.job_queue import claim_entry, make_worker_id
+from utils.bulk_jobs import submit_bulk_job, running_job, job_status
+from utils.governor import governor, Overloaded
+from utils.uploads import save_upload
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, as_naive_utc,
+)
+from utils.upload_sessions import (
+    create_session, session_status, append_chunk, finalize_session, abort_session,
+)
+from config import ANALYSIS_MODE
 import traceback
 
 router = APIRouter(prefix="/check-in", tags=["Check-In"])
@@ -12,68 +32,45 @@ UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "..", "uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
-def _run_analysis_in_background(entry_id: int, file_path: str, text_input: str):
+def _run_analysis_in_background(entry_id: int, file_path: str, text_input: str, media=None):
     """
-    Runs emotion analysis in a background thread with its own DB session.
-    Called via FastAPI BackgroundTasks so it never blocks the event loop.
+    Runs emotion analysis on one of the governor's slots with its own DB
+    session, so it never blocks the event loop.
+    The entry is claimed through the job queue first, so if this process
+    dies mid-analysis the lease expires and a worker picks the entry up.
+    `media` is the video already decoded during a chunked upload.
     """
-    NEGATIVE_EMOTIONS = {"sad", "angry", "fearful", "disgust"}
-
+    worker_id = make_worker_id("api")
     db: Session = SessionLocal()
     try:
-        entry = db.query(models.MoodEntry).filter(models.MoodEntry.id == entry_id).first()
-        if not entry:
-            return
-
-        result = predict_emotion(file_path, text_input)
-        emotion = result["predicted_emotion"]
-
-        entry.emotion = emotion
-        entry.confidence = result["confidence"]
-        entry.probabilities = result["probabilities"]
-        entry.status = models.EntryStatus.analyzed
-        entry.analysis_error = None
-        db.commit()
-
-        # Auto-create an Alert row for negative emotions so AlertsPage
-        # can persist and acknowledge them properly.
-        if emotion and emotion.lower() in NEGATIVE_EMOTIONS:
-            urgency = (
-                models.AlertUrgency.high
-                if emotion.lower() in {"fearful", "angry"}
-                else models.AlertUrgency.medium
-            )
-            alert = models.Alert(
-                owner_id=entry.user_id,
-                mood_entry_id=entry.id,
-                alert_type="Negative Emotion Detected",
-                description=(
-                    f"Detected \"{emotion.capitalize()}\" with "
-                    f"{result['confidence']:.1f}% confidence during your check-in."
-                ),
-                status=models.AlertStatus.new,
-                urgency=urgency,
-            )
-            db.add(alert)
-            db.commit()
-
-    except Exception as e:
-        traceback.print_exc()
-        try:
-            entry = db.query(models.MoodEntry).filter(models.MoodEntry.id == entry_id).first()
-            if entry:
-                entry.status = models.EntryStatus.failed
-                entry.analysis_error = str(e)
-                db.commit()
-        except Exception:
-            pass
+        claimed = claim_entry(db, entry_id, worker_id)
     finally:
         db.close()
 
+    if claimed:
+        run_claimed_job(entry_id, worker_id, media=media)
+
+
+def _too_busy(e: Overloaded):
+    return HTTPException(
+        status_code=http_status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Too many check-ins are being analyzed right now. Please retry in about {e.retry_after} seconds.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def _admit():
+    """429 with Retry-After when the governor's backlog is full."""
+    if ANALYSIS_MODE == "queue":
+        return
+    try:
+        governor.admit()
+    except Overloaded as e:
+        raise _too_busy(e)
+
 
 @router.post("/multimodal", status_code=202)
 async def create_multimodal_checkin(
-    background_tasks: BackgroundTasks,
     text_input: str = Form(...),
     video_file: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -81,18 +78,15 @@ async def create_multimodal_checkin(
 ):
     """
     Saves the video and returns 202 immediately.
-    Emotion analysis runs as a background task so the event loop
-    is never blocked and other pages continue to load normally.
+    Emotion analysis runs on the governor's slots (or, with ANALYSIS_MODE=queue,
+    on a separate worker process) so the event loop is never blocked and
+    other pages continue to load normally. The response carries the queue
+    position and ETA; when the backlog is full it is a 429 with Retry-After.
     """
-    file_extension = video_file.filename.split(".")[-1]
-    file_name = f"{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, file_name)
+    _admit()
 
-    try:
-        with open(file_path, "wb") as f:
-            f.write(await video_file.read())
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    # Streamed to disk off the event loop, size-limited and ffprobe-checked
+    file_path = (await save_upload(video_file, UPLOAD_DIR)).path
 
     # Create the entry immediately with status=uploaded so the user
     # can see it in Mood Tracking right away (as Pending → Analyzing → Analyzed)
@@ -106,50 +100,286 @@ async def create_multimodal_checkin(
     db.commit()
     db.refresh(checkin)
 
-    # Schedule analysis to run after the response is sent
-    background_tasks.add_task(_run_analysis_in_background, checkin.id, file_path, text_input)
+    # Queue the analysis on the governor; in queue mode the `uploaded`
+    # row itself is the job and a worker will claim it.
+    queue = {}
+    if ANALYSIS_MODE != "queue":
+        queue = governor.submit(_run_analysis_in_background, checkin.id, file_path, text_input)
 
     return {
         "message": "Check-in received. Analysis is running in the background.",
         "id": checkin.id,
+        **queue,
     }
 
 
+@router.post("/uploads", status_code=201)
+def create_upload_session(
+    body: UploadSessionCreate,
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Opens a chunked upload for a check-in that is still being recorded.
+    The client PUTs chunks as they are produced and decoding starts on
+    the first one, so little work is left when the recording stops.
+    """
+    upload_id = create_session(UPLOAD_DIR, current_user.id, body.filename)
+    return {"upload_id": upload_id, "offset": 0}
+
+
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+):
+    """Appends the raw request body at `offset`; 409 carries the offset to resume from."""
+    return await append_chunk(UPLOAD_DIR, upload_id, current_user.id, offset, request)
+
+
+@router.get("/uploads/{upload_id}")
+def get_upload_session(
+    upload_id: str,
+    current_user: models.User = Depends(get_current_user),
+):
+    """Bytes received so far, for resuming after a dropped connection."""
+    return session_status(UPLOAD_DIR, upload_id, current_user.id)
+
+
+@router.post("/uploads/{upload_id}/finalize", status_code=202)
+async def finalize_upload_session(
+    upload_id: str,
+    body: UploadSessionFinalize,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Completes a chunked upload and queues its analysis, like /multimodal.
+    When this process decoded the video while it arrived, the analysis
+    reuses those frames and audio instead of decoding the file again.
+    """
+    _admit()
+
+    file_path, media = await run_in_threadpool(
+        finalize_session, UPLOAD_DIR, upload_id, current_user.id,
+    )
+
+    checkin = models.MoodEntry(
+        user_id=current_user.id,
+        video_path=file_path,
+        text_input=body.text_input,
+        status=models.EntryStatus.uploaded,
+    )
+    db.add(checkin)
+    db.commit()
+    db.refresh(checkin)
+
+    queue = {}
+    if ANALYSIS_MODE != "queue":
+        queue = governor.submit(_run_analysis_in_background, checkin.id, file_path, body.text_input, media)
+
+    return {
+        "message": "Check-in received. Analysis is running in the background.",
+        "id": checkin.id,
+        **queue,
+    }
+
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+def delete_upload_session(
+    upload_id: str,
+    current_user: models.User = Depends(get_current_user),
+):
+    """Discards an unfinished upload (e.g. the user cancelled the recording)."""
+    abort_session(UPLOAD_DIR, upload_id, current_user.id)
+
+
+@router.post("/text", status_code=201)
+async def create_text_checkin(
+    body: TextCheckInCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Text-only check-in for users who can't record video. Only the text
+    encoder runs, so the result is returned synchronously. The row is
+    inserted already analyzed (or failed), never as `uploaded`, so no
+    queue worker or bulk job can pick it up meanwhile.
+    """
+    text_input = body.text_input.strip()
+    if not text_input:
+        raise HTTPException(status_code=400, detail="Text cannot be empty.")
+
+    received_at = datetime.utcnow()
+    try:
+        # The governor's text lane: never queued behind video analyses, and
+        # awaited, so no threadpool worker is held while it runs
+        future = governor.submit_text(predict_emotion, None, text_input)
+    except Overloaded as e:
+        raise _too_busy(e)
+    try:
+        result = await asyncio.wrap_future(future)
+        error = None
+    except Exception as e:
+        traceback.print_exc()
+        result, error = None, e
+
+    checkin = models.MoodEntry(
+        user_id=current_user.id,
+        video_path=None,
+        text_input=text_input,
+        created_at=received_at,
+        status=models.EntryStatus.analyzed if error is None else models.EntryStatus.failed,
+    )
+    db.add(checkin)
+    db.flush()  # the status event and the Alert need the id
+
+    if error is not None:
+        store_failure(checkin, error)
+        db.commit()
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {error}")
+
+    apply_result(db, checkin, result)
+
+    return {
+        "message": "Check-in analyzed.",
+        "id": checkin.id,
+        "emotion": checkin.emotion,
+        "confidence": checkin.confidence,
+        "probabilities": checkin.probabilities,
+    }
+
+
+@router.get("/events")
+async def checkin_events(token: str = Depends(oauth2_scheme)):
+    """
+    Server-Sent Events stream of the current user's analysis results: an
+    event per entry that becomes analyzed or failed, from any API worker
+    or queue worker (fanned out via Postgres LISTEN/NOTIFY). Replaces
+    polling /history for status changes.
+    """
+    # Authenticate with a short-lived session; the stream must not hold a pooled connection
+    def authenticate():
+        db = SessionLocal()
+        try:
+            return get_current_user(token=token, db=db).id
+        finally:
+            db.close()
+
+    user_id = await run_in_threadpool(authenticate)
+    return StreamingResponse(
+        status_stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+PROVISIONAL_COLUMNS = ("partial_probabilities", "analysis_stage")
+# Output field -> (MoodEntry columns it needs, how it is rendered)
+ENTRY_FIELDS = {
+    "id": (("id",), lambda c: c.id),
+    "timestamp": (("created_at",), lambda c: c.created_at.isoformat()),
+    "emotion": (("emotion",), lambda c: c.emotion),
+    "confidence": (("confidence",), lambda c: c.confidence),
+    "probabilities": (("probabilities",), lambda c: c.probabilities),
+    "video_path": (("video_path",), lambda c: c.video_path),
+    "text_input": (("text_input",), lambda c: c.text_input),
+    "status": (("status",), lambda c: c.status.value if c.status else None),
+    "analysis_error": (("analysis_error",), lambda c: c.analysis_error),
+    # Provisional result from the modalities finished so far (None once analyzed)
+    "analysis_stage": (("analysis_stage",), lambda c: c.analysis_stage),
+    "partial_emotion": (PROVISIONAL_COLUMNS, lambda c: provisional_fields(c)["partial_emotion"]),
+    "partial_confidence": (PROVISIONAL_COLUMNS, lambda c: provisional_fields(c)["partial_confidence"]),
+    "partial_probabilities": (("partial_probabilities",), lambda c: c.partial_probabilities),
+}
+
+
+def _entry_json(c: models.MoodEntry, fields=ENTRY_FIELDS) -> dict:
+    return {name: ENTRY_FIELDS[name][1](c) for name in fields}
+
+
+def _parse_fields(fields: Optional[str]):
+    if not fields:
+        return list(ENTRY_FIELDS)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in ENTRY_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
 @router.get("/history")
-async def get_checkin_history(
+def get_checkin_history(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of the entry fields"),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """
-    Fetches all past multimodal check-ins for the current user.
-    Sorted by latest first (descending by timestamp).
+    The current user's check-ins, latest first, one page at a time.
+    Pages are keyset-paginated on (created_at, id): pass `next_cursor`
+    back as `cursor` for the next page (null on the last one). `from`/`to`
+    bound created_at, and `fields` limits both the columns loaded and the
+    keys returned (e.g. `fields=id,timestamp,emotion,status` skips the
+    JSON blobs). `total_checkins` is only counted for the first page.
     """
-    checkins = (
-        db.query(models.MoodEntry)
-        .filter(models.MoodEntry.user_id == current_user.id)
-        .order_by(models.MoodEntry.created_at.desc())
+    names = _parse_fields(fields)
+    M = models.MoodEntry
+
+    query = db.query(M).filter(M.user_id == current_user.id)
+    if from_:
+        query = query.filter(M.created_at >= as_naive_utc(from_))
+    if to:
+        query = query.filter(M.created_at < as_naive_utc(to))
+
+    total = None
+    if cursor is None:
+        # Index-only count over (user_id, created_at, id); no rows are materialized
+        total = query.with_entities(func.count(M.id)).scalar()
+    else:
+        query = query.filter(tuple_(M.created_at, M.id) < tuple_(*decode_cursor(cursor)))
+
+    # created_at and id are always loaded: the cursor is built from them
+    columns = {"id", "created_at"} | {col for name in names for col in ENTRY_FIELDS[name][0]}
+    rows = (
+        query.options(load_only(*(getattr(M, col) for col in columns)))
+        .order_by(M.created_at.desc(), M.id.desc())
+        .limit(limit + 1)
         .all()
     )
 
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].created_at, page[-1].id) if len(rows) > limit else None
+
     return {
         "user": current_user.email,
-        "total_checkins": len(checkins),
-        "checkins": [
-            {
-                "id": c.id,
-                "timestamp": c.created_at.isoformat(),
-                "emotion": c.emotion,
-                "confidence": c.confidence,
-                "probabilities": c.probabilities,
-                "video_path": c.video_path,
-                "text_input": c.text_input,
-                "status": c.status.value if c.status else None,
-                "analysis_error": c.analysis_error,
-            }
-            for c in checkins
-        ]
+        "total_checkins": total,
+        "checkins": [_entry_json(c, names) for c in page],
+        "next_cursor": next_cursor,
     }
 
+
+@router.get("/status/{entry_id}")
+def get_checkin_status(
+    entry_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """One entry's status, with the provisional result while it is still being analyzed."""
+    entry = (
+        db.query(models.MoodEntry)
+        .filter(models.MoodEntry.id == entry_id)
+        .filter(models.MoodEntry.user_id == current_user.id)
+        .first()
+    )
+    if not entry:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return _entry_json(entry)
+
 @router.post("/upload-video")
 async def upload_video_only(
     video_file: UploadFile = File(...),
@@ -161,22 +391,8 @@ async def upload_video_only(
     Useful for batch upload or delayed analysis.
     """
 
-    # Validate extension
-    file_extension = video_file.filename.split(".")[-1].lower()
-    allowed_ext = ["mp4", "mov", "avi", "mkv", "webm"]
-    if file_extension not in allowed_ext:
-        raise HTTPException(status_code=400, detail="Unsupported file format")
-
-    # Create file path
-    file_name = f"{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join(UPLOAD_DIR, file_name)
-
-    # Save file
-    try:
-        with open(file_path, "wb") as f:
-            f.write(await video_file.read())
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    # Validate, stream to disk and ffprobe-check before creating the entry
+    file_path = (await save_upload(video_file, UPLOAD_DIR)).path
 
 
     # Store entry WITHOUT emotion analysis
@@ -206,57 +422,52 @@ async def upload_video_only(
         }
     }
 
-@router.post("/process-pending")
-async def process_pending_checkins(
+@router.post("/process-pending", status_code=202)
+def process_pending_checkins(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)  # optional protection
 ):
     """
-    Batch processes all MoodEntry rows with status='uploaded'
+    Submits a bulk job that analyzes every MoodEntry row with status='uploaded'
+    across a process pool. Returns immediately; poll
+    GET /check-in/process-pending/{job_id} for progress.
     """
-    pending = (
-        db.query(models.MoodEntry)
-        .filter(models.MoodEntry.status == models.EntryStatus.uploaded)
-        .all()
-    )
+    job, created = submit_bulk_job(db, current_user.id)
 
-    if not pending:
+    if job is None:
         return {"message": "No pending entries"}
 
-    processed = []
-    failed = []
-
-    for entry in pending:
-        try:
-            result = predict_emotion(entry.video_path, entry.text_input or "")
-            entry.emotion = result["predicted_emotion"]
-            entry.confidence = result["confidence"]
-            entry.probabilities = result["probabilities"]
-            entry.status = models.EntryStatus.analyzed
-            entry.analysis_error = None
-            processed.append(entry.id)
-
-        except Exception as e:
-            entry.status = models.EntryStatus.failed
-            entry.analysis_error = str(e)
-            failed.append(entry.id)
-
-    db.commit()
-
     return {
-        "message": "✅ Batch processing complete",
-        "processed_count": len(processed),
-        "failed_count": len(failed),
-        "processed": processed,
-        "failed": failed,
+        "message": "Bulk processing started" if created else "Bulk processing already running",
+        **job_status(job),
     }
 
+
+@router.get("/process-pending/{job_id}")
+def get_bulk_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Counts, throughput and ETA for a bulk processing job."""
+    job = db.query(models.BulkJob).filter(models.BulkJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == models.BulkJobStatus.running:
+        job = running_job(db) or job  # fails it if the coordinator died
+    return job_status(job)
+
 @router.post("/analyze/{entry_id}")
-async def analyze_single_entry(
+def analyze_single_entry(
     entry_id: int,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
+    """
+    (Re-)analyzes one entry and waits for the result. The entry is claimed
+    through the job queue, so a worker or a queued analysis never runs it
+    at the same time, and it runs on a governor slot like any other.
+    """
     entry = (
         db.query(models.MoodEntry)
         .filter(models.MoodEntry.id == entry_id)
@@ -270,25 +481,35 @@ async def analyze_single_entry(
     if entry.status == models.EntryStatus.analyzed:
         return {"message": "Already analyzed", "id": entry.id}
 
-    try:
-        result = predict_emotion(entry.video_path, entry.text_input or "")
-        entry.emotion = result["predicted_emotion"]
-        entry.confidence = result["confidence"]
-        entry.probabilities = result["probabilities"]
-        entry.status = models.EntryStatus.analyzed
-        entry.analysis_error = None
-
-    except Exception as e:
-        print("Analysis error:", e)
-        traceback.print_exc()
-        entry.status = models.EntryStatus.failed
-        entry.analysis_error = str(e)
+    _admit()
+
+    if entry.status == models.EntryStatus.failed:
+        # A manual retry puts the entry back in line with a fresh attempt budget
+        db.query(models.MoodEntry).filter(
+            models.MoodEntry.id == entry.id,
+            models.MoodEntry.status == models.EntryStatus.failed,
+        ).update({
+            models.MoodEntry.status: models.EntryStatus.uploaded,
+            models.MoodEntry.analysis_error: None,
+            models.MoodEntry.attempts: 0,
+            models.MoodEntry.claimed_by: None,
+            models.MoodEntry.lease_expires_at: None,
+        }, synchronize_session=False)
         db.commit()
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {e}")
 
+    worker_id = make_worker_id("api")
+    if not claim_entry(db, entry.id, worker_id):
+        return {"message": "Analysis in progress", "id": entry.id}
+
+    # Stores the result with apply_result, or the failure, on its own session
+    governor.run(run_claimed_job, entry.id, worker_id)
 
-    db.commit()
     db.refresh(entry)
+    if entry.status == models.EntryStatus.uploaded:
+        # Our lease lapsed and another worker took the entry over
+        return {"message": "Analysis in progress", "id": entry.id}
+    if entry.status == models.EntryStatus.failed:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {entry.analysis_error}")
 
     return {
         "message": "✅ Entry analyzed",
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, and_
 from typing import Optional, List
 from datetime import datetime, timedelta
 from utils.aggregation import aggregate_last_14_days
-from db import get_db
+from db import get_db, SessionLocal
 import models
 from schemas import QuickThoughtResponse
 from utils.security import get_current_user
 from pydantic import BaseModel
-from utils.llm import generate_structured_insights
+from utils.llm import request_structured_insights
+from utils.insights import generate_local_insights
+from config import INSIGHTS_MODE
 
 router = APIRouter(
     prefix="/dashboard",
@@ -124,8 +126,36 @@ def get_dashboard_summary(
         new_alerts_count=alerts_count
     )
 
+def build_insights(base_report: dict):
+    """Structured insights for the report and where they came from ("llm" or "local")."""
+    if INSIGHTS_MODE == "llm":
+        try:
+            return request_structured_insights(base_report), "llm"
+        except Exception as e:
+            print("Groq structured summary failed:", e)
+    return generate_local_insights(base_report), "local"
+
+
+def refine_report_with_llm(report_id: int, base_report: dict):
+    """Background task (hybrid mode): replaces local insights with the LLM's."""
+    db = SessionLocal()
+    try:
+        structured = request_structured_insights(base_report)
+        wr = db.get(models.WeeklyReport, report_id)
+        if wr is None:
+            return
+        wr.payload = {**(wr.payload or {}), **structured, "insights_source": "llm"}
+        db.commit()
+    except Exception as e:
+        print(f"LLM refinement of weekly report {report_id} failed, keeping local insights:", e)
+        db.rollback()
+    finally:
+        db.close()
+
+
 @router.get("/weekly-report")
 def get_weekly_report(
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
     refresh: bool = False,  # ?refresh=true to force regeneration
@@ -191,16 +221,20 @@ def get_weekly_report(
             return payload
 
     # generate fresh structured insights
-    structured = generate_structured_insights(base_report)
+    structured, source = build_insights(base_report)
 
     # persist
     wr = models.WeeklyReport(
         user_id=current_user.id,
         period_start=period_start,
         period_end=period_end,
-        payload={**structured, **{"risk_score": risk, "summary_14": summary_14, "phq_9": base_report["phq_9"]}},
+        payload={**structured, **{"risk_score": risk, "summary_14": summary_14, "phq_9": base_report["phq_9"]},
+                 "insights_source": source},
     )
     db.add(wr)
     db.commit()
 
+    if INSIGHTS_MODE == "hybrid":
+        background_tasks.add_task(refine_report_with_llm, wr.id, base_report)
+
     return wr.payload
\ No newline at end of file
@@ -0,0 +1,35 @@
+# backend/routes/health.py
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from utils.inference_client import inference_status
+from utils.governor import governor
+from utils.events import hub
+from config import MODEL_WARMUP
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+def liveness():
+    """The process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness():
+    """
+    Reports which models are loaded and warmed, with load time and memory
+    footprint. Returns 503 until every model scheduled for warmup is warm
+    so the orchestrator only routes traffic to warm instances; with
+    MODEL_WARMUP=lazy nothing is scheduled and it returns 200 at once.
+    """
+    inference = inference_status()
+    ready = inference.pop("ready")
+    body = {
+        "status": "ready" if ready else "warming",
+        "warmup": MODEL_WARMUP,
+        **inference,
+        "governor": governor.stats(),
+        "event_subscribers": hub.subscriber_count(),
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
@@ -0,0 +1,17 @@
+# backend/routes/metrics.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from utils.metrics import render_prometheus
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Latency histograms (Prometheus text format) per analysis stage: decode,
+    transcription, audio, face, text, meta, total, db_commit and
+    time_to_analysis, for results stored by any process sharing
+    PROMETHEUS_MULTIPROC_DIR (only this one when it is unset).
+    """
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -61,6 +61,17 @@ class QuickThoughtResponse(BaseModel):
     class Config:
         from_attributes = True # for orm_mode (Pydantic v2)
 
+# Schema for a text-only check-in (no video)
+class TextCheckInCreate(BaseModel):
+    text_input: str = Field(..., min_length=1, max_length=2000)
+
+# Schemas for a chunked video upload (uploaded while recording)
+class UploadSessionCreate(BaseModel):
+    filename: str = "checkin.webm"
+
+class UploadSessionFinalize(BaseModel):
+    text_input: str = ""
+
 class MoodEntryBase(BaseModel):
     mood_label: str
     mood_score: Optional[float] = None
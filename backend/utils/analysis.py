@@ -0,0 +1,142 @@
+import time
+import traceback
+from datetime import datetime
+from sqlalchemy.orm import Session
+
+import models
+from db import SessionLocal
+from utils.job_queue import heartbeat, release
+from utils.events import publish_status
+from utils.metrics import observe_stage, observe_stages
+from utils.inference_client import predict_emotion
+
+NEGATIVE_EMOTIONS = {"sad", "angry", "fearful", "disgust"}
+
+
+def store_metrics(entry: models.MoodEntry, result: dict) -> None:
+    """
+    Keeps the stage timings and model versions on the entry, adds the
+    upload-to-result latency, and feeds the /metrics histograms.
+    """
+    metrics = dict(result.get("metrics") or {})
+    if entry.created_at:
+        metrics["time_to_analysis_ms"] = round(
+            (datetime.utcnow() - entry.created_at).total_seconds() * 1000, 2
+        )
+        observe_stage("time_to_analysis", metrics["time_to_analysis_ms"])
+    observe_stages(metrics.get("stages_ms"))
+    entry.analysis_metrics = metrics
+
+
+def store_result(db: Session, entry: models.MoodEntry, result: dict) -> None:
+    """
+    Stores an analysis result on the entry, releases its lease and, for
+    negative emotions, adds the Alert row AlertsPage acknowledges.
+    Does not commit, so callers can commit many entries at once; the
+    status event goes out with that commit.
+    """
+    emotion = result["predicted_emotion"]
+
+    entry.emotion = emotion
+    entry.confidence = result["confidence"]
+    entry.probabilities = result["probabilities"]
+    entry.status = models.EntryStatus.analyzed
+    entry.analysis_error = None
+    if result.get("transcript") is not None:
+        entry.transcript = result["transcript"]
+    # The fused result replaces the provisional one
+    entry.partial_probabilities = None
+    entry.analysis_stage = None
+    store_metrics(entry, result)
+    release(entry)
+    publish_status(entry)
+
+    # Auto-create an Alert row for negative emotions so AlertsPage
+    # can persist and acknowledge them properly.
+    if emotion and emotion.lower() in NEGATIVE_EMOTIONS:
+        urgency = (
+            models.AlertUrgency.high
+            if emotion.lower() in {"fearful", "angry"}
+            else models.AlertUrgency.medium
+        )
+        alert = models.Alert(
+            owner_id=entry.user_id,
+            mood_entry_id=entry.id,
+            alert_type="Negative Emotion Detected",
+            description=(
+                f"Detected \"{emotion.capitalize()}\" with "
+                f"{result['confidence']:.1f}% confidence during your check-in."
+            ),
+            status=models.AlertStatus.new,
+            urgency=urgency,
+        )
+        db.add(alert)
+
+
+def store_failure(entry: models.MoodEntry, error) -> None:
+    entry.status = models.EntryStatus.failed
+    entry.analysis_error = str(error)
+    entry.analysis_stage = None
+    release(entry)
+    publish_status(entry)
+
+
+def apply_result(db: Session, entry: models.MoodEntry, result: dict) -> None:
+    store_result(db, entry, result)
+    start = time.perf_counter()
+    db.commit()
+    observe_stage("db_commit", (time.perf_counter() - start) * 1000)
+
+
+def mark_failed(db: Session, entry_id: int, error: Exception) -> None:
+    try:
+        db.rollback()
+        entry = db.query(models.MoodEntry).filter(models.MoodEntry.id == entry_id).first()
+        if entry:
+            store_failure(entry, error)
+            db.commit()
+    except Exception:
+        pass
+
+
+def run_claimed_job(entry_id: int, worker_id: str, media=None) -> None:
+    """
+    Analyzes an entry this worker holds the lease on, with its own DB
+    session. The lease is renewed by heartbeat while the models run.
+    `media` is the entry's video if it was already decoded during upload.
+    """
+    db: Session = SessionLocal()
+    try:
+        entry = db.query(models.MoodEntry).filter(models.MoodEntry.id == entry_id).first()
+        if not entry or entry.claimed_by != worker_id:
+            return
+
+        def save_transcript(text):
+            entry.transcript = text
+            db.commit()
+
+        def save_partial(stage, partial):
+            entry.partial_probabilities = partial["probabilities"]
+            entry.analysis_stage = stage
+            publish_status(entry)
+            db.commit()
+
+        with heartbeat(entry_id, worker_id):
+            result = predict_emotion(
+                entry.video_path, entry.text_input or "",
+                transcript=entry.transcript, on_transcript=save_transcript, media=media,
+                on_partial=save_partial,
+            )
+
+        # Another worker may have taken over after our lease lapsed
+        db.refresh(entry)
+        if entry.claimed_by != worker_id or entry.status != models.EntryStatus.uploaded:
+            return
+
+        apply_result(db, entry, result)
+
+    except Exception as e:
+        traceback.print_exc()
+        mark_failed(db, entry_id, e)
+    finally:
+        db.close()
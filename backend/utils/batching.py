@@ -0,0 +1,137 @@
+import threading
+import time
+import queue
+
+
+class _Pending:
+    __slots__ = ("item", "size", "result", "error", "done")
+
+    def __init__(self, item, size):
+        self.item = item
+        self.size = size
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Collects requests from concurrent callers for up to `max_wait_ms`
+    (or until `max_batch_size` is reached) and runs them through
+    `run_batch` as a single forward pass. Each caller blocks in submit()
+    and gets back only its own result.
+
+    `run_batch(items)` must return one result per item, in order.
+    `size_of(item)` lets one request count as several batch slots
+    (e.g. a list of video frames); it defaults to 1 per request.
+    """
+
+    def __init__(self, name, run_batch, max_batch_size=8, max_wait_ms=10, size_of=None):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0, float(max_wait_ms)) / 1000.0
+        self.size_of = size_of or (lambda item: 1)
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # Counters
+        self.batches = 0
+        self.requests = 0
+        self.slots_used = 0
+        self.errors = 0
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name=f"batcher-{self.name}", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, item):
+        """Queues one request and waits for its result."""
+        self._ensure_started()
+        pending = _Pending(item, self.size_of(item))
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def submit_many(self, items):
+        """Queues several requests at once (so they can share a batch) and waits for all."""
+        self._ensure_started()
+        pendings = [_Pending(item, self.size_of(item)) for item in items]
+        for p in pendings:
+            self._queue.put(p)
+        for p in pendings:
+            p.done.wait()
+        for p in pendings:
+            if p.error is not None:
+                raise p.error
+        return [p.result for p in pendings]
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        used = first.size
+        deadline = time.monotonic() + self.max_wait
+
+        while used < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                nxt = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(nxt)
+            used += nxt.size
+
+        return batch, used
+
+    def _loop(self):
+        while True:
+            batch, used = self._collect()
+            try:
+                results = self.run_batch([p.item for p in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"{self.name} batch returned {len(results)} results for {len(batch)} requests"
+                    )
+                for p, r in zip(batch, results):
+                    p.result = r
+            except Exception as e:
+                print(f"Error in {self.name} batch of {len(batch)}: {e}")
+                for p in batch:
+                    p.error = e
+                with self._stats_lock:
+                    self.errors += 1
+            finally:
+                with self._stats_lock:
+                    self.batches += 1
+                    self.requests += len(batch)
+                    self.slots_used += used
+                for p in batch:
+                    p.done.set()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            batches = self.batches
+            fill = (self.slots_used / (batches * self.max_batch_size)) if batches else 0.0
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "batches": batches,
+                "requests": self.requests,
+                "avg_requests_per_batch": round(self.requests / batches, 2) if batches else 0.0,
+                "fill_rate": round(fill, 3),
+                "errors": self.errors,
+                "queued": self._queue.qsize(),
+            }
@@ -0,0 +1,269 @@
+import multiprocessing
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+
+import models
+from db import SessionLocal
+from config import BULK_PROCESSES, BULK_COMMIT_SIZE, JOB_LEASE_SECONDS, INFERENCE_SERVER
+from utils.analysis import store_result, store_failure
+from utils.job_queue import claim_entry, renew_lease, make_worker_id
+from utils.metrics import observe_stage
+
+# A running job whose coordinator hasn't written progress for this long is dead
+STALE_AFTER = timedelta(minutes=10)
+COMMIT_INTERVAL_SECONDS = 5.0
+
+
+def _init_pool_process(threads: int):
+    if INFERENCE_SERVER:
+        return  # the inference server owns the models and its threads
+    import torch
+    torch.set_num_threads(threads)
+
+
+def _analyze_in_process(entry_id: int, video_path: str, text_input: str, transcript: str = None):
+    """Runs in a pool process; models are loaded lazily once per process."""
+    from utils.inference_client import predict_emotion
+    try:
+        return entry_id, predict_emotion(video_path, text_input or "", transcript=transcript), None
+    except Exception as e:
+        traceback.print_exc()
+        return entry_id, None, str(e)
+
+
+def pending_entry_ids(db):
+    now = datetime.utcnow()
+    rows = (
+        db.query(models.MoodEntry.id)
+        .filter(models.MoodEntry.status == models.EntryStatus.uploaded)
+        .filter(
+            (models.MoodEntry.lease_expires_at.is_(None))
+            | (models.MoodEntry.lease_expires_at < now)
+        )
+        .order_by(models.MoodEntry.created_at)
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def running_job(db):
+    """The job currently in progress, failing it first if its coordinator died."""
+    job = (
+        db.query(models.BulkJob)
+        .filter(models.BulkJob.status == models.BulkJobStatus.running)
+        .order_by(models.BulkJob.id.desc())
+        .first()
+    )
+    if job and job.updated_at and datetime.utcnow() - job.updated_at > STALE_AFTER:
+        job.status = models.BulkJobStatus.failed
+        job.error = "Job stopped reporting progress"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        return None
+    return job
+
+
+def job_status(job: models.BulkJob) -> dict:
+    done = job.processed + job.failed + job.skipped
+    end = job.finished_at or datetime.utcnow()
+    elapsed = max((end - job.started_at).total_seconds(), 1e-6) if job.started_at else 0.0
+    throughput = done / elapsed if elapsed else 0.0
+    remaining = max(job.total - done, 0)
+    eta = remaining / throughput if throughput > 0 and job.status == models.BulkJobStatus.running else None
+
+    return {
+        "job_id": job.id,
+        "status": job.status.value,
+        "total": job.total,
+        "processed": job.processed,
+        "failed": job.failed,
+        "skipped": job.skipped,
+        "remaining": remaining,
+        "workers": job.workers,
+        "throughput_per_min": round(throughput * 60, 2),
+        "eta_seconds": round(eta, 1) if eta is not None else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "error": job.error,
+    }
+
+
+def _commit_batch(job_id: int, worker_id: str, results: list) -> None:
+    """Writes one batch of results and the job counters in a single commit."""
+    db = SessionLocal()
+    try:
+        by_id = {eid: (result, error) for eid, result, error in results}
+        entries = (
+            db.query(models.MoodEntry)
+            .filter(models.MoodEntry.id.in_(list(by_id)))
+            .all()
+        )
+        ok = failed = skipped = 0
+        for entry in entries:
+            # Only write rows we still hold the lease on
+            if entry.claimed_by != worker_id or entry.status != models.EntryStatus.uploaded:
+                skipped += 1
+                continue
+            result, error = by_id[entry.id]
+            if result is not None:
+                store_result(db, entry, result)
+                ok += 1
+            else:
+                store_failure(entry, error)
+                failed += 1
+        skipped += len(by_id) - len(entries)  # deleted meanwhile
+
+        job = db.get(models.BulkJob, job_id)
+        job.processed += ok
+        job.failed += failed
+        job.skipped += skipped
+        job.updated_at = datetime.utcnow()
+        start = time.perf_counter()
+        db.commit()
+        observe_stage("db_commit", (time.perf_counter() - start) * 1000)
+    finally:
+        db.close()
+
+
+def _touch(job_id: int, skipped: int = 0) -> None:
+    """Records skipped entries and proves the coordinator is still alive."""
+    db = SessionLocal()
+    try:
+        job = db.get(models.BulkJob, job_id)
+        job.skipped += skipped
+        job.updated_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _claim_for_bulk(entry_id: int, worker_id: str):
+    """Claims the entry and returns (video_path, text_input, transcript), or None if someone else has it."""
+    db = SessionLocal()
+    try:
+        if not claim_entry(db, entry_id, worker_id):
+            return None
+        entry = db.get(models.MoodEntry, entry_id)
+        return entry.video_path, entry.text_input, entry.transcript
+    finally:
+        db.close()
+
+
+def run_bulk_job(job_id: int, entry_ids: list, processes: int) -> None:
+    """
+    Spreads the entries over a process pool, keeping at most two jobs per
+    process in flight. Every in-flight entry holds a job-queue lease that
+    is renewed while it waits, and results are committed in batches.
+    """
+    worker_id = make_worker_id(f"bulk{job_id}")
+    threads = max(1, (multiprocessing.cpu_count() or 1) // processes)
+    todo = iter(entry_ids)
+    in_flight = {}
+    buffer = []
+    last_commit = time.monotonic()
+    last_renew = time.monotonic()
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_pool_process,
+            initargs=(threads,),
+        ) as pool:
+
+            def fill():
+                skipped = 0
+                while len(in_flight) < processes * 2:
+                    entry_id = next(todo, None)
+                    if entry_id is None:
+                        break
+                    claimed = _claim_for_bulk(entry_id, worker_id)
+                    if claimed is None:
+                        skipped += 1
+                        continue
+                    in_flight[pool.submit(_analyze_in_process, entry_id, *claimed)] = entry_id
+                if skipped:
+                    _touch(job_id, skipped)
+
+            fill()
+            while in_flight:
+                done, _ = wait(list(in_flight), timeout=COMMIT_INTERVAL_SECONDS, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    entry_id = in_flight.pop(fut)
+                    try:
+                        buffer.append(fut.result())
+                    except Exception as e:  # pool process died
+                        buffer.append((entry_id, None, str(e)))
+
+                now = time.monotonic()
+                if buffer and (len(buffer) >= BULK_COMMIT_SIZE or not in_flight
+                               or now - last_commit >= COMMIT_INTERVAL_SECONDS):
+                    _commit_batch(job_id, worker_id, buffer)
+                    buffer = []
+                    last_commit = now
+
+                if now - last_renew >= JOB_LEASE_SECONDS / 3:
+                    for entry_id in in_flight.values():
+                        renew_lease(entry_id, worker_id)
+                    _touch(job_id)
+                    last_renew = now
+
+                fill()
+
+        _finish(job_id, models.BulkJobStatus.completed)
+
+    except Exception as e:
+        traceback.print_exc()
+        if buffer:
+            try:
+                _commit_batch(job_id, worker_id, buffer)
+            except Exception:
+                traceback.print_exc()
+        _finish(job_id, models.BulkJobStatus.failed, str(e))
+
+
+def _finish(job_id: int, status: models.BulkJobStatus, error: str = None) -> None:
+    db = SessionLocal()
+    try:
+        job = db.get(models.BulkJob, job_id)
+        job.status = status
+        job.error = error
+        job.finished_at = job.updated_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+
+def submit_bulk_job(db, user_id: int):
+    """
+    Starts a bulk job over every unleased `uploaded` entry, or returns the
+    job that is already running. Returns (job, created) or (None, False)
+    when there is nothing to do.
+    """
+    existing = running_job(db)
+    if existing:
+        return existing, False
+
+    entry_ids = pending_entry_ids(db)
+    if not entry_ids:
+        return None, False
+
+    processes = max(1, min(BULK_PROCESSES, len(entry_ids)))
+    job = models.BulkJob(
+        submitted_by=user_id,
+        status=models.BulkJobStatus.running,
+        total=len(entry_ids),
+        workers=processes,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    threading.Thread(
+        target=run_bulk_job, args=(job.id, entry_ids, processes),
+        name=f"bulk-job-{job.id}", daemon=True,
+    ).start()
+    return job, True
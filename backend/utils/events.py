@@ -0,0 +1,177 @@
+import asyncio
+import json
+import threading
+import time
+import traceback
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.orm import object_session
+
+from db import engine
+
+# Postgres channel carrying MoodEntry status changes to every API process
+CHANNEL = "mood_entry_status"
+# Comment line sent on idle streams so proxies don't close them
+KEEPALIVE_SECONDS = 15
+# Events a slow client may fall behind by before it is told to refetch instead
+SUBSCRIBER_QUEUE_SIZE = 100
+RECONNECT_SECONDS = 5
+RESYNC = {"resync": True}
+# Postgres refuses NOTIFY payloads of 8000 bytes or more, and the error would
+# abort the very transaction storing the status; stay well below it
+NOTIFY_MAX_BYTES = 7000
+MAX_EVENT_ERROR_CHARS = 500
+
+
+def provisional_fields(entry) -> dict:
+    """The provisional result of an entry still being analyzed (all None otherwise)."""
+    partial = entry.partial_probabilities
+    emotion = max(partial, key=partial.get) if partial else None
+    return {
+        "analysis_stage": entry.analysis_stage,
+        "partial_emotion": emotion,
+        "partial_confidence": round(partial[emotion] * 100, 2) if emotion else None,
+        "partial_probabilities": partial,
+    }
+
+
+def entry_event(entry) -> dict:
+    return {
+        "id": entry.id,
+        "user_id": entry.user_id,
+        "status": entry.status.value if entry.status else None,
+        "emotion": entry.emotion,
+        "confidence": entry.confidence,
+        "probabilities": entry.probabilities,
+        "analysis_error": (entry.analysis_error or "")[:MAX_EVENT_ERROR_CHARS] or None,
+        **provisional_fields(entry),
+    }
+
+
+def notify_payload(entry) -> str:
+    """
+    The entry's event as JSON, under NOTIFY_MAX_BYTES. If it would not fit,
+    only id, user_id and status are sent with `refetch` set, and the
+    client re-reads the entry.
+    """
+    payload = json.dumps(entry_event(entry), default=str)
+    if len(payload.encode("utf-8")) < NOTIFY_MAX_BYTES:
+        return payload
+    return json.dumps({
+        "id": entry.id,
+        "user_id": entry.user_id,
+        "status": entry.status.value if entry.status else None,
+        "refetch": True,
+    })
+
+
+def publish_status(entry) -> None:
+    """
+    Queues a NOTIFY for the entry's current status on its own session.
+    Postgres delivers it only when that transaction commits, so listeners
+    never see a result that was rolled back.
+    """
+    db = object_session(entry)
+    if db is None or entry.id is None:
+        return
+    payload = notify_payload(entry)
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANNEL, "payload": payload})
+
+
+class StatusHub:
+    """
+    Fans NOTIFY payloads out to this process's SSE subscribers. One LISTEN
+    connection per API process, on a daemon thread; each subscriber gets
+    an asyncio.Queue on its own event loop.
+    """
+
+    def __init__(self):
+        self._subscribers = {}   # user_id -> set of (loop, queue)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        self._ensure_listener()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(user_id, set())
+            subs.difference_update({s for s in subs if s[1] is queue})
+            if not subs:
+                self._subscribers.pop(user_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        with self._lock:
+            targets = list(self._subscribers.get(event.get("user_id"), ()))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen, name="status-listener", daemon=True)
+                self._thread.start()
+
+    def _listen(self) -> None:
+        url = engine.url
+        while True:
+            try:
+                with psycopg.connect(
+                    host=url.host, port=url.port, user=url.username,
+                    password=url.password, dbname=url.database, autocommit=True,
+                ) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    for notify in conn.notifies():
+                        self._dispatch(notify.payload)
+            except Exception:
+                traceback.print_exc()
+            time.sleep(RECONNECT_SECONDS)
+
+
+def _offer(queue: asyncio.Queue, event: dict) -> None:
+    if queue.full():
+        # The client fell behind: drop the backlog and tell it to refetch instead
+        while not queue.empty():
+            queue.get_nowait()
+        event = RESYNC
+    queue.put_nowait(event)
+
+
+hub = StatusHub()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def status_stream(user_id: int):
+    """
+    Server-Sent Events for one user: `ready` once subscribed (the client
+    loads its history then), `status` per provisional result and per
+    analyzed/failed entry, and `resync` when the client fell too far behind.
+    """
+    queue = hub.subscribe(user_id)
+    try:
+        yield _sse("ready", {})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _sse("resync", {}) if event is RESYNC else _sse("status", event)
+    finally:
+        hub.unsubscribe(user_id, queue)
@@ -0,0 +1,173 @@
+import math
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    ANALYSIS_CONCURRENCY, ANALYSIS_MAX_BACKLOG, ANALYSIS_TEXT_SLOTS, ANALYSIS_TEXT_MAX_BACKLOG,
+    INFERENCE_SERVER,
+)
+
+# Until real analyses have been timed, ETAs assume this many seconds each
+DEFAULT_ANALYSIS_SECONDS = 20.0
+# Text-only analyses take milliseconds; a full text lane clears within about this long
+TEXT_RETRY_AFTER_SECONDS = 1
+EWMA_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    """The backlog is full; the client should retry after `retry_after` seconds."""
+
+    def __init__(self, backlog: int, retry_after: int):
+        super().__init__(f"Analysis backlog is full ({backlog} waiting)")
+        self.backlog = backlog
+        self.retry_after = retry_after
+
+
+class AnalysisGovernor:
+    """
+    Runs at most `slots` analyses at once on a FIFO thread pool, and gives
+    each slot an equal share of the cores through torch.set_num_threads, so
+    a burst of uploads queues up instead of oversubscribing the CPU.
+    admit() rejects new work once `max_backlog` analyses are waiting.
+
+    Text-only analyses get their own lane of `text_slots` threads with its
+    own backlog, so they never queue behind video analyses; those slots
+    count towards the core split as well.
+    """
+
+    def __init__(self, slots: int, max_backlog: int, cores: int, text_slots: int = 1, text_max_backlog: int = 0):
+        self.slots = max(1, int(slots))
+        self.max_backlog = max(0, int(max_backlog))
+        self.text_slots = max(1, int(text_slots))
+        self.text_max_backlog = max(0, int(text_max_backlog))
+        self.threads_per_slot = max(1, int(cores) // (self.slots + self.text_slots))
+        self._executor = ThreadPoolExecutor(max_workers=self.slots, thread_name_prefix="analysis")
+        self._text_executor = ThreadPoolExecutor(max_workers=self.text_slots, thread_name_prefix="analysis-text")
+        self._lock = threading.Lock()
+        self._threads_set = False
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.avg_seconds = None
+        self.text_pending = 0
+        self.text_completed = 0
+        self.text_rejected = 0
+
+    def _configure_threads(self):
+        # Intra-op threads are process-wide in torch, so one setting covers every slot
+        if self._threads_set or INFERENCE_SERVER:
+            return  # with a shared inference server, its own process holds the threads
+        import torch
+        torch.set_num_threads(self.threads_per_slot)
+        self._threads_set = True
+
+    def _estimate(self, ahead: int) -> int:
+        per_job = self.avg_seconds or DEFAULT_ANALYSIS_SECONDS
+        return int(math.ceil((ahead // self.slots + 1) * per_job))
+
+    def admit(self) -> None:
+        """Raises Overloaded when the waiting backlog has reached max_backlog."""
+        with self._lock:
+            if self.max_backlog and self.waiting >= self.max_backlog:
+                self.rejected += 1
+                raise Overloaded(self.waiting, self._estimate(self.waiting))
+
+    def submit(self, fn, *args) -> dict:
+        """
+        Queues fn(*args). Returns its queue position (0 = starts right away,
+        n = n analyses must finish or start first) and an ETA in seconds.
+        """
+        with self._lock:
+            free = self.slots - self.running - self.waiting
+            position = 0 if free > 0 else self.waiting + 1
+            eta = self._estimate(position)
+            self.waiting += 1
+        self._executor.submit(self._run, fn, args)
+        return {"queue_position": position, "eta_seconds": eta}
+
+    def run(self, fn, *args):
+        """
+        Runs fn(*args) on a slot, in the same FIFO line as submit(), and
+        blocks until it finishes. Returns its result or re-raises its error.
+        """
+        with self._lock:
+            self.waiting += 1
+        return self._executor.submit(self._call, fn, args).result()
+
+    def submit_text(self, fn, *args):
+        """
+        Runs fn(*args) on the text lane and returns its concurrent Future.
+        Raises Overloaded when `text_max_backlog` text analyses are pending;
+        the video backlog plays no part.
+        """
+        with self._lock:
+            if self.text_max_backlog and self.text_pending >= self.text_max_backlog:
+                self.text_rejected += 1
+                raise Overloaded(self.text_pending, TEXT_RETRY_AFTER_SECONDS)
+            self.text_pending += 1
+        return self._text_executor.submit(self._call_text, fn, args)
+
+    def _call_text(self, fn, args):
+        with self._lock:
+            self._configure_threads()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.text_pending -= 1
+                self.text_completed += 1
+
+    def _run(self, fn, args):
+        try:
+            self._call(fn, args)
+        except Exception:
+            traceback.print_exc()
+
+    def _call(self, fn, args):
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+            self._configure_threads()
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.avg_seconds = (
+                    elapsed if self.avg_seconds is None
+                    else (1 - EWMA_ALPHA) * self.avg_seconds + EWMA_ALPHA * elapsed
+                )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "slots": self.slots,
+                "threads_per_slot": self.threads_per_slot,
+                "max_backlog": self.max_backlog,
+                "running": self.running,
+                "waiting": self.waiting,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_seconds": round(self.avg_seconds, 2) if self.avg_seconds is not None else None,
+                "text": {
+                    "slots": self.text_slots,
+                    "max_backlog": self.text_max_backlog,
+                    "pending": self.text_pending,
+                    "completed": self.text_completed,
+                    "rejected": self.text_rejected,
+                },
+            }
+
+
+# Shared by every route that starts in-process analyses
+governor = AnalysisGovernor(
+    ANALYSIS_CONCURRENCY, ANALYSIS_MAX_BACKLOG, os.cpu_count() or 1,
+    text_slots=ANALYSIS_TEXT_SLOTS, text_max_backlog=ANALYSIS_TEXT_MAX_BACKLOG,
+)
@@ -0,0 +1,162 @@
+import os
+from types import SimpleNamespace
+
+import torch
+
+# Optimized artifacts live next to the meta-model
+OPTIMIZED_DIR = os.path.join("metamodels", "optimized")
+
+# "torch" (fp32), "torch-int8" (dynamic int8 quantization),
+# "onnx" (ONNX Runtime fp32) or "onnx-int8" (ONNX Runtime, int8 weights)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Graph inputs/outputs of each encoder, shared by export and runtime
+ENCODERS = {
+    "face": {
+        "inputs": ["pixel_values"],
+        "output": "logits",
+        "dynamic_axes": {"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+    },
+    "audio": {
+        "inputs": ["input_values"],
+        "output": "last_hidden_state",
+        "dynamic_axes": {
+            "input_values": {0: "batch", 1: "samples"},
+            "last_hidden_state": {0: "batch", 1: "frames"},
+        },
+    },
+    "text": {
+        "inputs": ["input_ids", "attention_mask"],
+        "output": "logits",
+        "dynamic_axes": {
+            "input_ids": {0: "batch", 1: "tokens"},
+            "attention_mask": {0: "batch", 1: "tokens"},
+            "logits": {0: "batch"},
+        },
+    },
+}
+
+
+def backend_device(backend: str = None) -> str:
+    """Quantized and ONNX Runtime encoders run on CPU only."""
+    backend = backend or INFERENCE_BACKEND
+    return "cuda" if backend == "torch" and torch.cuda.is_available() else "cpu"
+
+
+def onnx_path(name: str, quantized: bool = False) -> str:
+    return os.path.join(OPTIMIZED_DIR, f"{name}{'.int8' if quantized else ''}.onnx")
+
+
+def int8_path(name: str) -> str:
+    return os.path.join(OPTIMIZED_DIR, f"{name}.int8.pt")
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of every Linear layer (weights int8, activations fp32)."""
+    return torch.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime session with the slice of the HF model interface the
+    pipeline uses: call with tokenizer/processor tensors, read `.logits`
+    or `.last_hidden_state`, and `config` for labels and conv geometry.
+    """
+
+    def __init__(self, path, config, input_names, output_name):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("INFERENCE_BACKEND=onnx needs `pip install onnxruntime`") from e
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self.config = config
+        self.input_names = input_names
+        self.output_name = output_name
+
+    def __call__(self, **inputs):
+        feed = {
+            name: inputs[name].cpu().numpy()
+            for name in self.input_names
+            if name in inputs
+        }
+        out = self.session.run([self.output_name], feed)[0]
+        return SimpleNamespace(**{self.output_name: torch.from_numpy(out)})
+
+    def to(self, device):
+        return self
+
+    def eval(self):
+        return self
+
+
+def load_encoder(name: str, model_id: str, model_cls, backend: str = None):
+    """Loads one encoder for the selected backend."""
+    backend = backend or INFERENCE_BACKEND
+
+    if backend == "torch":
+        return model_cls.from_pretrained(model_id).to(backend_device(backend)).eval()
+
+    if backend == "torch-int8":
+        path = int8_path(name)
+        if os.path.exists(path):
+            return torch.load(path, weights_only=False).eval()
+        # No exported artifact: quantizing at load time only takes a few seconds
+        return quantize_int8(model_cls.from_pretrained(model_id))
+
+    if backend in ("onnx", "onnx-int8"):
+        from transformers import AutoConfig
+
+        path = onnx_path(name, quantized=backend == "onnx-int8")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run `python optimize_models.py export` first")
+        spec = ENCODERS[name]
+        return OnnxEncoder(path, AutoConfig.from_pretrained(model_id), spec["inputs"], spec["output"])
+
+    raise ValueError(f"Unknown INFERENCE_BACKEND '{backend}' (expected one of {', '.join(BACKENDS)})")
+
+
+def export_encoder(name: str, model_id: str, model_cls, sample_inputs: dict) -> list:
+    """
+    Writes the int8 PyTorch module and the fp32 / int8 ONNX graphs for one
+    encoder into OPTIMIZED_DIR. Returns the written paths.
+    """
+    os.makedirs(OPTIMIZED_DIR, exist_ok=True)
+    spec = ENCODERS[name]
+    model = model_cls.from_pretrained(model_id).eval()
+    written = []
+
+    torch.save(quantize_int8(model_cls.from_pretrained(model_id)), int8_path(name))
+    written.append(int8_path(name))
+
+    class _SingleOutput(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *args):
+            out = self.inner(**dict(zip(spec["inputs"], args)))
+            return getattr(out, spec["output"])
+
+    args = tuple(sample_inputs[n] for n in spec["inputs"])
+    with torch.no_grad():
+        torch.onnx.export(
+            _SingleOutput(model), args, onnx_path(name),
+            input_names=spec["inputs"],
+            output_names=[spec["output"]],
+            dynamic_axes=spec["dynamic_axes"],
+            opset_version=17,
+        )
+    written.append(onnx_path(name))
+
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError as e:
+        raise RuntimeError("ONNX int8 export needs `pip install onnxruntime`") from e
+    quantize_dynamic(onnx_path(name), onnx_path(name, quantized=True), weight_type=QuantType.QInt8)
+    written.append(onnx_path(name, quantized=True))
+
+    return written
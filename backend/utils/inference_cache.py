@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction is serialized within the process only
+    fcntl = None
+
+INFERENCE_CACHE_ENABLED = os.getenv("INFERENCE_CACHE", "true").lower() in ("1", "true", "yes")
+INFERENCE_CACHE_DIR = os.getenv("INFERENCE_CACHE_DIR", os.path.join("cache", "inference"))
+INFERENCE_CACHE_MAX_MB = float(os.getenv("INFERENCE_CACHE_MAX_MB", "256"))
+
+_HASH_CHUNK = 1 << 20
+# A process re-scans the shared directory after writing this share of the budget
+RESCAN_FRACTION = 0.05
+# An over-budget scan evicts down to this share, so scans stay rare
+EVICT_TO_FRACTION = 0.9
+LOCK_FILE = ".lock"
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def version_hash(parts) -> str:
+    """Short stable hash of whatever settings a cached stage depends on."""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+_file_hashes = {}
+_file_hashes_lock = threading.Lock()
+
+
+def sha256_file(path: str) -> str:
+    """Content hash of a file, memoized per (path, size, mtime) within this process."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _file_hashes_lock:
+        if memo_key in _file_hashes:
+            return _file_hashes[memo_key]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    with _file_hashes_lock:
+        if len(_file_hashes) > 4096:
+            _file_hashes.clear()
+        _file_hashes[memo_key] = digest
+    return digest
+
+
+def remember_file_hash(path: str, digest: str) -> None:
+    """Seeds the sha256_file memo with a hash computed elsewhere (e.g. while uploading)."""
+    st = os.stat(path)
+    with _file_hashes_lock:
+        _file_hashes[(os.path.abspath(path), st.st_size, st.st_mtime_ns)] = digest
+
+
+class DiskLRUCache:
+    """
+    Small JSON values persisted one file per key. Recency is the file mtime
+    (get() touches it), so every process sharing the directory agrees on
+    it. The byte budget holds across processes (API, workers, bulk pool):
+    after writing RESCAN_FRACTION of max_bytes, a process scans the
+    directory under an exclusive file lock and removes the least recently
+    used files down to EVICT_TO_FRACTION. Between scans each process can
+    overshoot by at most RESCAN_FRACTION.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._written = 0   # bytes this process wrote since its last scan
+        self._entries = 0   # as of the last scan
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    @staticmethod
+    def _file_name(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json"
+
+    def get(self, key: str):
+        path = os.path.join(self.directory, self._file_name(key))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)["value"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        try:
+            os.utime(path)  # recency, shared with every other process
+        except OSError:
+            pass
+        return value
+
+    def set(self, key: str, value) -> None:
+        path = os.path.join(self.directory, self._file_name(key))
+        data = json.dumps({"key": key, "value": value}, default=float).encode("utf-8")
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._written += len(data)
+            due = self._written >= max(1, int(self.max_bytes * RESCAN_FRACTION))
+            if due:
+                self._written = 0
+        if due:
+            self._scan()
+
+    @contextmanager
+    def _dir_lock(self):
+        """Exclusive across processes where flock exists, else within this process only."""
+        with self._scan_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, LOCK_FILE), "a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _scan(self):
+        """Measures the whole directory and evicts the oldest files if it is over budget."""
+        with self._dir_lock():
+            files = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                files.append((st.st_mtime, name, st.st_size))
+            files.sort()
+            total = sum(size for _, _, size in files)
+            removed = 0
+            if total > self.max_bytes:
+                target = int(self.max_bytes * EVICT_TO_FRACTION)
+                while total > target and removed < len(files) - 1:
+                    _, name, size = files[removed]
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+                    total -= size
+                    removed += 1
+        with self._lock:
+            self._entries = len(files) - removed
+            self._total = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._entries,
+                "size_mb": round((self._total + self._written) / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class InferenceCache:
+    """
+    Content-addressed cache of per-modality outputs. Keys combine a stage
+    name, content hashes (video bytes and/or text) and a version hash of
+    the settings that stage depends on, so changing a model or parameter
+    never serves stale results.
+    """
+
+    def __init__(self, directory=INFERENCE_CACHE_DIR, max_mb=INFERENCE_CACHE_MAX_MB,
+                 enabled=INFERENCE_CACHE_ENABLED):
+        self.enabled = enabled
+        self._store = DiskLRUCache(directory, int(max_mb * 1024 * 1024)) if enabled else None
+
+    @staticmethod
+    def key(stage: str, version: str, *content_hashes) -> str:
+        return ":".join([stage, version, *content_hashes])
+
+    def get(self, key: str):
+        return self._store.get(key) if self.enabled else None
+
+    def set(self, key: str, value) -> None:
+        if not self.enabled:
+            return
+        try:
+            self._store.set(key, value)
+        except Exception as e:
+            print("Inference cache write failed:", e)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **(self._store.stats() if self.enabled else {})}
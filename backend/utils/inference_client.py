@@ -0,0 +1,133 @@
+import http.client
+import json
+import os
+import socket
+from urllib.parse import urlsplit
+
+from config import INFERENCE_SERVER, INFERENCE_SERVER_TIMEOUT, ANALYSIS_MODE
+
+# What predict_text_only() needs: the text encoder and the meta-classifier
+TEXT_ONLY_MODELS = ["text", "meta"]
+
+
+class InferenceServerError(RuntimeError):
+    pass
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._socket_path)
+        self.sock = sock
+
+
+def _connection(timeout):
+    if INFERENCE_SERVER.startswith("unix:"):
+        return _UnixHTTPConnection(INFERENCE_SERVER[len("unix:"):], timeout)
+    url = urlsplit(INFERENCE_SERVER)
+    return http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+
+
+def _request(method, path, payload=None, timeout=INFERENCE_SERVER_TIMEOUT):
+    """One JSON request to the inference server. Returns (status, body)."""
+    conn = _connection(timeout)
+    try:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        data = resp.read()
+        return resp.status, json.loads(data or b"{}")
+    finally:
+        conn.close()
+
+
+def remote() -> bool:
+    return bool(INFERENCE_SERVER)
+
+
+def predict_emotion(video_path, text_input, transcript=None, on_transcript=None, media=None,
+                    on_partial=None):
+    """
+    Same contract as utils.predict_emotion.predict_emotion. With
+    INFERENCE_SERVER set, the models live in inference_server.py and only
+    the video's file path crosses the socket (a pre-decoded `media` is not
+    sent and no provisional results are reported); otherwise it runs
+    in-process.
+    """
+    if not remote():
+        from utils.predict_emotion import predict_emotion as predict_local
+        return predict_local(
+            video_path, text_input, transcript=transcript, on_transcript=on_transcript, media=media,
+            on_partial=on_partial,
+        )
+
+    payload = {
+        "video_path": os.path.abspath(video_path) if video_path else None,
+        "text_input": text_input or "",
+        "transcript": transcript,
+    }
+    try:
+        status, body = _request("POST", "/predict", payload)
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        raise InferenceServerError(f"Inference server unreachable at {INFERENCE_SERVER}: {e}") from e
+
+    # The server reports a fresh transcript even when a later stage failed
+    fresh = body.get("transcript") if transcript is None else None
+    if fresh is not None and on_transcript:
+        on_transcript(fresh)
+
+    if status != 200:
+        raise InferenceServerError(body.get("error") or f"Inference server returned {status}")
+    return body
+
+
+def inference_status() -> dict:
+    """Readiness, model, batching and cache info of whichever process owns the models."""
+    if not remote():
+        from utils.predict_emotion import registry, batching_stats, cache_stats
+        return {
+            "ready": registry.is_ready(),
+            "models": registry.status(),
+            "batching": batching_stats(),
+            "cache": cache_stats(),
+        }
+    try:
+        status, body = _request("GET", "/status", timeout=5)
+        return {**body, "server": INFERENCE_SERVER} if status == 200 else {
+            "ready": False, "server": INFERENCE_SERVER, "error": f"status {status}",
+        }
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        return {"ready": False, "server": INFERENCE_SERVER, "error": str(e)}
+
+
+def warmup(names=None) -> None:
+    """Loads and warms the given models (all by default) in this process; a no-op when a server owns them."""
+    if not remote():
+        from utils.predict_emotion import registry
+        registry.warmup(names)
+
+
+def api_models():
+    """
+    Models the API process runs itself: none with an inference server,
+    only the text-only check-in's with ANALYSIS_MODE=queue (worker.py
+    analyzes the videos), otherwise all of them (None).
+    """
+    if remote():
+        return []
+    if ANALYSIS_MODE == "queue":
+        return list(TEXT_ONLY_MODELS)
+    return None
+
+
+def expect_models(names) -> None:
+    """Makes readiness wait only for `names` (e.g. [] when models load lazily)."""
+    if not remote():
+        from utils.predict_emotion import registry
+        registry.expect(names)
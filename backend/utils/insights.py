@@ -0,0 +1,128 @@
+"""
+Local, rule-based weekly insights.
+
+Produces the same JSON shape as utils/llm.request_structured_insights from
+the 14-day aggregation, the risk score and PHQ-9, deterministically and
+without any network call.
+"""
+
+# Score bands (mental-state score: 0 = calm, 100 = strongly negative)
+LOW_RISK = 35
+HIGH_RISK = 60
+TREND_THRESHOLD = 10      # points between first and last check-in
+FLUCTUATION_STD = 20
+PHQ_FOLLOWUP_SCORE = 10   # PHQ-9 "moderate" and above
+
+SUGGESTIONS = {
+    "low": [
+        "Keep your current routine going - it seems to be working",
+        "Take a short walk outside to enjoy a good moment",
+        "Write down one thing that went well today",
+        "Share something positive with a friend",
+    ],
+    "medium": [
+        "Try 2 minutes of slow breathing when things feel heavy",
+        "Take a 10-minute walk between tasks",
+        "Write a 3-line journal entry before bed",
+        "Drink a glass of water and stretch for a few minutes",
+    ],
+    "high": [
+        "Reach out to someone you trust and tell them how you feel",
+        "Try 4-7-8 breathing a few times a day",
+        "Keep a simple routine: regular meals, sleep and a short walk",
+        "Write down what is weighing on you, even in a few words",
+    ],
+}
+
+
+def _risk_band(risk):
+    if risk >= HIGH_RISK:
+        return "high"
+    if risk >= LOW_RISK:
+        return "medium"
+    return "low"
+
+
+def mood_direction(summary_14: dict) -> str:
+    slope = summary_14.get("trend_slope", 0) or 0
+    if summary_14.get("num_entries", 0) < 2:
+        return "stable"
+    if slope <= -TREND_THRESHOLD:
+        return "improving"
+    if slope >= TREND_THRESHOLD:
+        return "declining"
+    if (summary_14.get("std_dev", 0) or 0) >= FLUCTUATION_STD:
+        return "fluctuating"
+    return "stable"
+
+
+def generate_local_insights(report_json: dict) -> dict:
+    """
+    Returns the structured dict the weekly report UI expects, built from
+    summary_14, risk_score and phq_9 only.
+    """
+    summary_14 = report_json.get("summary_14") or {}
+    risk = float(report_json.get("risk_score") or 0)
+    phq_score = (report_json.get("phq_9") or {}).get("score")
+
+    entries = summary_14.get("num_entries", 0)
+    neg_ratio = summary_14.get("neg_ratio", 0) or 0
+    direction = mood_direction(summary_14)
+    band = _risk_band(risk)
+
+    tone = {
+        "low": "Your check-ins over the last two weeks look mostly calm and balanced.",
+        "medium": "Your check-ins over the last two weeks show a mix of lighter and heavier moments.",
+        "high": "The last two weeks seem to have been hard on you, and that is worth being gentle about.",
+    }[band]
+    trend = {
+        "improving": "Things have been moving in a better direction lately.",
+        "declining": "Recent check-ins feel heavier than earlier ones.",
+        "fluctuating": "Your mood has been going up and down from day to day.",
+        "stable": "Your mood has stayed fairly steady.",
+    }[direction]
+    summary = f"{tone} {trend} Thank you for checking in {entries} time{'s' if entries != 1 else ''}."
+
+    key_insights = [
+        f"{round(neg_ratio * 100)}% of your check-ins carried a strong negative emotion.",
+        f"Your mental-state score ranged from {summary_14.get('best', 0)} to {summary_14.get('worst', 0)} "
+        f"(average {summary_14.get('avg_score', 0)}; lower is calmer).",
+    ]
+    if phq_score is not None:
+        key_insights.append(f"Your latest PHQ-9 score was {phq_score} out of 27.")
+    else:
+        key_insights.append("Taking the PHQ-9 survey would add more context to these insights.")
+
+    strengths = []
+    if entries >= 5:
+        strengths.append("You checked in regularly, which builds self-awareness")
+    else:
+        strengths.append("You keep showing up for yourself")
+    if direction == "improving":
+        strengths.append("You are making steady progress")
+    elif neg_ratio < 0.5:
+        strengths.append("Most of your days held some balance")
+    else:
+        strengths.append("You care about your wellbeing")
+
+    possible_triggers = []
+    if neg_ratio >= 0.5:
+        possible_triggers.append("Negative emotions showed up on most days")
+    if direction == "declining":
+        possible_triggers.append("Something recent may be adding pressure")
+    if direction == "fluctuating":
+        possible_triggers.append("Day-to-day changes in sleep, workload or routine")
+    if phq_score is not None and phq_score >= PHQ_FOLLOWUP_SCORE:
+        possible_triggers.append("Ongoing low mood reflected in your PHQ-9 answers")
+
+    recommend_followup = band == "high" or (phq_score is not None and phq_score >= PHQ_FOLLOWUP_SCORE)
+
+    return {
+        "summary": summary,
+        "mood_direction": direction,
+        "key_insights": key_insights,
+        "suggestions": list(SUGGESTIONS[band]),
+        "strengths": strengths,
+        "possible_triggers": possible_triggers[:3],
+        "recommend_followup": recommend_followup,
+    }
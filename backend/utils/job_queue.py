@@ -0,0 +1,138 @@
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+import models
+from db import SessionLocal
+from utils.events import publish_status
+from config import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS
+
+
+def make_worker_id(prefix: str = "worker") -> str:
+    return f"{prefix}-{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+
+
+def _claimable(query, now):
+    """Rows in the `uploaded` state that nobody currently holds a lease on."""
+    return query.filter(
+        models.MoodEntry.status == models.EntryStatus.uploaded,
+        or_(
+            models.MoodEntry.lease_expires_at.is_(None),
+            models.MoodEntry.lease_expires_at < now,
+        ),
+    )
+
+
+def is_leased(entry: models.MoodEntry) -> bool:
+    return bool(entry.lease_expires_at and entry.lease_expires_at > datetime.utcnow())
+
+
+def _take(db: Session, entry: models.MoodEntry, worker_id: str, now: datetime) -> bool:
+    """Stamps the lease on a locked row, or fails it once it has crashed too often."""
+    if entry.attempts >= JOB_MAX_ATTEMPTS:
+        entry.status = models.EntryStatus.failed
+        entry.analysis_error = f"Analysis abandoned after {entry.attempts} attempts"
+        entry.claimed_by = None
+        entry.lease_expires_at = None
+        publish_status(entry)
+        db.commit()
+        return False
+
+    entry.claimed_by = worker_id
+    entry.lease_expires_at = now + timedelta(seconds=JOB_LEASE_SECONDS)
+    entry.attempts = (entry.attempts or 0) + 1
+    db.commit()
+    return True
+
+
+def claim_next(db: Session, worker_id: str):
+    """
+    Claims the oldest unleased `uploaded` entry with
+    SELECT ... FOR UPDATE SKIP LOCKED, so concurrent workers never
+    take the same row. Returns the entry id, or None if the queue is empty.
+    """
+    while True:
+        now = datetime.utcnow()
+        entry = (
+            _claimable(db.query(models.MoodEntry), now)
+            .order_by(models.MoodEntry.created_at)
+            .with_for_update(skip_locked=True)
+            .limit(1)
+            .first()
+        )
+        if entry is None:
+            db.rollback()
+            return None
+        if _take(db, entry, worker_id, now):
+            return entry.id
+
+
+def claim_entry(db: Session, entry_id: int, worker_id: str) -> bool:
+    """Claims one specific entry (used by the in-process background path)."""
+    now = datetime.utcnow()
+    entry = (
+        _claimable(db.query(models.MoodEntry), now)
+        .filter(models.MoodEntry.id == entry_id)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if entry is None:
+        db.rollback()
+        return False
+    return _take(db, entry, worker_id, now)
+
+
+def renew_lease(entry_id: int, worker_id: str) -> bool:
+    """Extends our lease; returns False if the row is no longer ours."""
+    db = SessionLocal()
+    try:
+        updated = (
+            db.query(models.MoodEntry)
+            .filter(
+                models.MoodEntry.id == entry_id,
+                models.MoodEntry.claimed_by == worker_id,
+                models.MoodEntry.status == models.EntryStatus.uploaded,
+            )
+            .update(
+                {models.MoodEntry.lease_expires_at: datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return updated == 1
+    finally:
+        db.close()
+
+
+def release(entry: models.MoodEntry) -> None:
+    """Clears the lease fields; the caller commits together with the result."""
+    entry.claimed_by = None
+    entry.lease_expires_at = None
+
+
+@contextmanager
+def heartbeat(entry_id: int, worker_id: str):
+    """Renews the lease every third of JOB_LEASE_SECONDS while the body runs."""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(JOB_LEASE_SECONDS / 3):
+            try:
+                if not renew_lease(entry_id, worker_id):
+                    print(f"⚠️ Lost lease on entry {entry_id} ({worker_id})")
+                    return
+            except Exception as e:
+                print(f"Heartbeat failed for entry {entry_id}:", e)
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{entry_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join(timeout=5)
@@ -18,9 +18,12 @@ Return ONLY valid minified JSON with these keys:
 }
 """
 
-def generate_structured_insights(report_json: dict) -> dict:
+INSIGHT_KEYS = ["summary","mood_direction","key_insights","suggestions","strengths","possible_triggers","recommend_followup"]
+
+
+def request_structured_insights(report_json: dict) -> dict:
     """
-    Returns a structured dict for UI sections.
+    Asks the LLM for the structured insights. Raises on any failure.
     """
     prompt = f"""
 You are Nexis, a supportive wellbeing assistant.
@@ -39,37 +42,24 @@ Create supportive, actionable insights with a gentle, warm tone.
 {SCHEMA_HINT}
 """
 
-    try:
-        resp = client.chat.completions.create(
-            model=MODEL_NAME,
-            temperature=0.6,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        text = resp.choices[0].message.content.strip()
+    resp = client.chat.completions.create(
+        model=MODEL_NAME,
+        temperature=0.6,
+        messages=[{"role": "user", "content": prompt}],
+    )
+    text = resp.choices[0].message.content.strip()
 
-        # robust JSON parse (strip code fences if any)
-        if text.startswith("```"):
-            text = text.strip("`")
-            # remove possible language tag like json
-            if text.startswith("json"):
-                text = text[4:].strip()
+    # robust JSON parse (strip code fences if any)
+    if text.startswith("```"):
+        text = text.strip("`")
+        # remove possible language tag like json
+        if text.startswith("json"):
+            text = text[4:].strip()
 
-        data = json.loads(text)
-        # minimal validation
-        for k in ["summary","mood_direction","key_insights","suggestions","strengths","possible_triggers","recommend_followup"]:
-            if k not in data:
-                raise ValueError(f"Missing key: {k}")
-        return data
+    data = json.loads(text)
+    # minimal validation
+    for k in INSIGHT_KEYS:
+        if k not in data:
+            raise ValueError(f"Missing key: {k}")
+    return data
 
-    except Exception as e:
-        print("Groq structured summary failed:", e)
-        # safe fallback
-        return {
-            "summary": "Unable to generate detailed insights right now.",
-            "mood_direction": "stable",
-            "key_insights": [],
-            "suggestions": ["Take a short mindful walk", "Try slow breathing", "Write a 3-line journal", "Hydrate and stretch"],
-            "strengths": ["You keep showing up", "You care about your wellbeing"],
-            "possible_triggers": [],
-            "recommend_followup": False
-        }
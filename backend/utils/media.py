@@ -0,0 +1,357 @@
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SAMPLE_RATE = 16000
+# Frames come out of ffmpeg already at the face model's input size
+FACE_FRAME_SIZE = int(os.getenv("FACE_FRAME_SIZE", "224"))
+
+
+@dataclass
+class DecodedMedia:
+    """
+    Everything the analysis stages need from one uploaded video, decoded once.
+    Whisper, wav2vec2 and the face model all read from this object, so the
+    container is only parsed by the decode stage.
+    """
+    video_path: str
+    samples: np.ndarray                          # mono int16 PCM @ 16 kHz
+    frames: list = field(default_factory=list)   # sampled frames as PIL images
+    duration: float = 0.0
+    sample_rate: int = SAMPLE_RATE
+
+    @property
+    def waveform(self) -> np.ndarray:
+        """float32 samples on the int16 scale (what wav2vec2 was fed from the wav file)."""
+        return self.samples.astype(np.float32)
+
+    @property
+    def whisper_audio(self) -> np.ndarray:
+        """float32 samples in [-1, 1], the format whisper.transcribe expects."""
+        return self.samples.astype(np.float32) / 32768.0
+
+
+def probe(video_path: str) -> dict:
+    """ffprobe the container: duration (None if unknown) and which streams exist."""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration:stream=codec_type,duration",
+        "-of", "json", str(video_path),
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    info = json.loads(proc.stdout or b"{}")
+    streams = info.get("streams", [])
+
+    duration = None
+    candidates = [info.get("format", {}).get("duration")] + [s.get("duration") for s in streams]
+    for value in candidates:
+        try:
+            duration = float(value)
+            break
+        except (TypeError, ValueError):
+            continue
+
+    return {
+        "duration": duration,
+        "has_audio": any(s.get("codec_type") == "audio" for s in streams),
+        "has_video": any(s.get("codec_type") == "video" for s in streams),
+    }
+
+
+def packet_duration(video_path: str, stream: str = "a:0"):
+    """
+    End time of the last packet of `stream`, in seconds, or None. For
+    containers whose header records no duration (MediaRecorder webm); it
+    only demuxes, nothing is decoded.
+    """
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", stream,
+        "-show_entries", "packet=pts_time,duration_time",
+        "-of", "csv=p=0", str(video_path),
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    end = None
+    for line in proc.stdout.decode("utf-8", "replace").splitlines():
+        fields = line.strip().split(",")
+        try:
+            t = float(fields[0]) + (float(fields[1]) if len(fields) > 1 and fields[1] else 0.0)
+        except (ValueError, IndexError):
+            continue
+        end = t if end is None else max(end, t)
+    return end
+
+
+def frame_timestamps(duration: float) -> np.ndarray:
+    num_frames = min(10, max(5, int(duration)))
+    return np.linspace(0.1, duration - 0.1, num=num_frames)
+
+
+def _select_filter(timestamps) -> str:
+    """
+    Keeps the first frame at or after each timestamp, then scales it to the
+    model input size, all inside one sequential decode.
+    """
+    terms = "+".join(f"gte(t\\,{t:.3f})*lt(prev_selected_t\\,{t:.3f})" for t in timestamps)
+    # prev_selected_t is NaN until the first frame is kept
+    first = f"gte(t\\,{timestamps[0]:.3f})*isnan(prev_selected_t)"
+    size = FACE_FRAME_SIZE
+    return f"select='{first}+{terms}',scale={size}:{size}:flags=bilinear"
+
+
+def _audio_args(target: str) -> list:
+    return [
+        "-map", "0:a:0",
+        "-acodec", "pcm_s16le",
+        "-ar", str(SAMPLE_RATE),
+        "-ac", "1",
+        "-f", "s16le", target,
+    ]
+
+
+def _video_args(timestamps, target: str) -> list:
+    return [
+        "-map", "0:v:0",
+        "-vf", _select_filter(timestamps),
+        "-vsync", "vfr",
+        "-pix_fmt", "rgb24",
+        "-f", "rawvideo", target,
+    ]
+
+
+def _ffmpeg(video_path: str, output_args: list, pass_fds=()) -> subprocess.Popen:
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", str(video_path)] + output_args
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=pass_fds)
+
+
+def _run(video_path: str, output_args: list) -> bytes:
+    proc = _ffmpeg(video_path, output_args)
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, "ffmpeg", out, err)
+    return out
+
+
+def _decode_single_pass(video_path: str, timestamps):
+    """
+    One ffmpeg process, two outputs: PCM on stdout and downscaled RGB
+    frames on an extra pipe, read concurrently so neither pipe blocks.
+    """
+    read_fd, write_fd = os.pipe()
+    try:
+        proc = _ffmpeg(
+            video_path,
+            _audio_args("pipe:1") + _video_args(timestamps, f"pipe:{write_fd}"),
+            pass_fds=(write_fd,),
+        )
+    finally:
+        os.close(write_fd)
+
+    chunks = []
+
+    def read_frames():
+        with os.fdopen(read_fd, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                chunks.append(chunk)
+
+    reader = threading.Thread(target=read_frames, daemon=True)
+    reader.start()
+    audio, err = proc.communicate()
+    reader.join()
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, "ffmpeg", audio, err)
+    return audio, b"".join(chunks)
+
+
+def _frames_from_raw(raw: bytes) -> list:
+    size = FACE_FRAME_SIZE
+    frame_bytes = size * size * 3
+    count = len(raw) // frame_bytes
+    arr = np.frombuffer(raw[: count * frame_bytes], dtype=np.uint8).reshape(count, size, size, 3)
+    return [Image.fromarray(frame) for frame in arr]
+
+
+def decode_audio(video_path: str) -> np.ndarray:
+    """Pipes ffmpeg's PCM output straight into a NumPy buffer (no temp wav file)."""
+    return np.frombuffer(_run(video_path, ["-vn"] + _audio_args("pipe:1")), dtype=np.int16)
+
+
+def decode_media(video_path) -> DecodedMedia:
+    """
+    Single decoding stage for a check-in video. Audio and the sampled face
+    frames come out of one sequential ffmpeg decode; frames are already
+    scaled to FACE_FRAME_SIZE, so full-resolution pixels never reach Python.
+    """
+    video_path = str(Path(video_path))
+
+    try:
+        info = probe(video_path)
+        if not info["has_audio"]:
+            raise ValueError("Video has no audio track")
+
+        duration = info["duration"]
+        if duration is None or os.name == "nt" or not info["has_video"]:
+            # Unknown duration (common for browser webm) or no extra pipes
+            # on Windows: take duration from the audio, then sample frames.
+            raw_audio = _run(video_path, ["-vn"] + _audio_args("pipe:1"))
+            duration = duration or len(raw_audio) / 2 / SAMPLE_RATE
+            raw_frames = (
+                _run(video_path, _video_args(frame_timestamps(duration), "pipe:1"))
+                if info["has_video"] else b""
+            )
+        else:
+            raw_audio, raw_frames = _decode_single_pass(video_path, frame_timestamps(duration))
+
+    except Exception:
+        print("\n❌ FFmpeg failed while decoding video!\n")
+        print("Video path:", video_path)
+        traceback.print_exc()
+        raise
+
+    return DecodedMedia(
+        video_path=video_path,
+        samples=np.frombuffer(raw_audio, dtype=np.int16),
+        frames=_frames_from_raw(raw_frames),
+        duration=duration,
+    )
+
+
+# Frames kept while a video is still arriving; the final 5-10 are picked at finish()
+STREAM_FRAME_INTERVAL = 1.0
+
+
+class StreamingDecoder:
+    """
+    Decodes a file that is still being written (a chunked upload): a feeder
+    thread tails the file into ffmpeg's stdin, hashing it on the way, while
+    PCM and one downscaled frame per STREAM_FRAME_INTERVAL are read back
+    concurrently. Once the upload is complete, finish() returns the same
+    DecodedMedia decode_media() would, minus the remaining decode time.
+    Needs a streamable container (e.g. MediaRecorder webm); on any ffmpeg
+    error finish() returns None and the caller decodes the file normally.
+    If no bytes arrive for `idle_timeout` seconds the feeder gives up and
+    ffmpeg exits, so an abandoned upload does not hold a process.
+    """
+
+    def __init__(self, path: str, is_complete, idle_timeout: float = None):
+        self.path = path
+        self.is_complete = is_complete   # () -> bool, True once no more bytes will arrive
+        self.idle_timeout = idle_timeout
+        self.sha256 = hashlib.sha256()
+        self.bytes_fed = 0
+        self._audio = []
+        self._frames = []
+        self._error = None
+        self._threads = []
+        self._proc = None
+
+    def start(self):
+        if os.name == "nt":
+            self._error = "no extra pipes on Windows"
+            return self
+        size = FACE_FRAME_SIZE
+        frame_filter = (
+            f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{STREAM_FRAME_INTERVAL})',"
+            f"scale={size}:{size}:flags=bilinear"
+        )
+        read_fd, write_fd = os.pipe()
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+            *_audio_args("pipe:1"),
+            "-map", "0:v:0?", "-vf", frame_filter, "-vsync", "vfr",
+            "-pix_fmt", "rgb24", "-f", "rawvideo", f"pipe:{write_fd}",
+        ]
+        try:
+            self._proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                pass_fds=(write_fd,),
+            )
+        finally:
+            os.close(write_fd)
+
+        def read_into(stream, sink):
+            for chunk in iter(lambda: stream.read(1 << 16), b""):
+                sink.append(chunk)
+
+        frames_file = os.fdopen(read_fd, "rb")
+        for target, args in (
+            (self._feed, ()),
+            (read_into, (self._proc.stdout, self._audio)),
+            (read_into, (frames_file, self._frames)),
+        ):
+            t = threading.Thread(target=target, args=args, daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def _feed(self):
+        try:
+            with open(self.path, "rb") as f:
+                last_data = time.monotonic()
+                while True:
+                    chunk = f.read(1 << 20)
+                    if chunk:
+                        last_data = time.monotonic()
+                        self.sha256.update(chunk)
+                        self.bytes_fed += len(chunk)
+                        self._proc.stdin.write(chunk)
+                    elif self.is_complete():
+                        # Re-check: the last chunk may have landed just before completion
+                        rest = f.read()
+                        if not rest:
+                            break
+                        self.sha256.update(rest)
+                        self.bytes_fed += len(rest)
+                        self._proc.stdin.write(rest)
+                    elif self.idle_timeout and time.monotonic() - last_data > self.idle_timeout:
+                        self._error = "upload idle"
+                        break
+                    else:
+                        time.sleep(0.05)
+        except Exception as e:
+            self._error = str(e)
+        finally:
+            try:
+                self._proc.stdin.close()
+            except Exception:
+                pass
+
+    def abort(self):
+        if self._proc and self._proc.poll() is None:
+            self._proc.kill()
+
+    def finish(self, timeout: float = 120.0):
+        """Waits for ffmpeg to drain and returns DecodedMedia, or None if streaming failed."""
+        if self._proc is None:
+            return None
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        try:
+            code = self._proc.wait(max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            self.abort()
+            return None
+        if code != 0 or self._error:
+            return None
+
+        samples = np.frombuffer(b"".join(self._audio), dtype=np.int16)
+        if not len(samples):
+            return None
+        duration = len(samples) / SAMPLE_RATE
+        kept = _frames_from_raw(b"".join(self._frames))
+        frames = []
+        if kept:
+            # Nearest kept frame (about one per STREAM_FRAME_INTERVAL) to each usual timestamp
+            for t in frame_timestamps(duration):
+                frames.append(kept[min(len(kept) - 1, int(round(t / STREAM_FRAME_INTERVAL)))])
+        return DecodedMedia(video_path=self.path, samples=samples, frames=frames, duration=duration)
@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds in seconds, from a cached lookup up to a long video on CPU
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_current_timings = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def stage_timings():
+    """Collects the durations of every timed() stage run inside this block (ms per stage)."""
+    timings = {}
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def timed(stage: str):
+    """Adds the block's wall time to the current stage_timings() collector, if any."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _current_timings.get()
+        if timings is not None:
+            ms = (time.perf_counter() - start) * 1000
+            timings[stage] = round(timings.get(stage, 0.0) + ms, 2)
+
+
+_stage_seconds = None
+_stage_seconds_lock = threading.Lock()
+
+
+def _histogram():
+    """
+    The stage histogram, created on first use so that prometheus_client is
+    imported after config has loaded .env: it picks multiprocess mode from
+    PROMETHEUS_MULTIPROC_DIR at import time.
+    """
+    global _stage_seconds
+    with _stage_seconds_lock:
+        if _stage_seconds is None:
+            from prometheus_client import Histogram
+            _stage_seconds = Histogram(
+                "nexis_analysis_stage_seconds", "Check-in analysis latency per pipeline stage.",
+                ["stage"], buckets=LATENCY_BUCKETS,
+            )
+        return _stage_seconds
+
+
+def observe_stage(stage: str, ms: float) -> None:
+    _histogram().labels(stage=stage).observe(ms / 1000.0)
+
+
+def observe_stages(stages_ms: dict) -> None:
+    for stage, ms in (stages_ms or {}).items():
+        observe_stage(stage, ms)
+
+
+def render_prometheus() -> bytes:
+    """
+    Stage latency histograms in the Prometheus text exposition format. With
+    PROMETHEUS_MULTIPROC_DIR set, every process that stores results (API
+    workers, worker.py, bulk job processes) writes its samples there and
+    this merges them; otherwise only this process's samples are reported.
+    """
+    from prometheus_client import CollectorRegistry, REGISTRY, generate_latest, multiprocess
+
+    _histogram()  # expose the metric (empty) before the first observation
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
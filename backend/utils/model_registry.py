@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+import traceback
+
+
+def _current_rss_bytes():
+    """Resident set size of this process, or None where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+
+def _tensor_bytes(obj):
+    """Parameter + buffer bytes of any torch modules inside `obj` (tuple or module)."""
+    items = obj if isinstance(obj, (tuple, list)) else (obj,)
+    total = 0
+    for item in items:
+        if hasattr(item, "parameters") and hasattr(item, "buffers"):
+            total += sum(p.numel() * p.element_size() for p in item.parameters())
+            total += sum(b.numel() * b.element_size() for b in item.buffers())
+    return total or None
+
+
+class _Entry:
+    def __init__(self, name, loader, warmup):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.lock = threading.Lock()
+        self.value = None
+        self.loaded = False
+        self.warmed = False
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.tensor_bytes = None
+        self.rss_delta_bytes = None
+        self.error = None
+
+
+class ModelRegistry:
+    """
+    Loads each model on first use (or on an explicit warmup() call) instead
+    of at import time. Loading is guarded per model, so concurrent first
+    requests wait for one load rather than loading twice.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._expected = None   # models readiness waits for; None = all registered
+
+    def register(self, name, loader, warmup=None):
+        """`loader()` returns the loaded object; `warmup()` runs a dummy forward pass."""
+        self._entries[name] = _Entry(name, loader, warmup)
+
+    def names(self):
+        return list(self._entries)
+
+    def get(self, name):
+        entry = self._entries[name]
+        if entry.loaded:
+            return entry.value
+        with entry.lock:
+            if not entry.loaded:
+                self._load(entry)
+        return entry.value
+
+    def _load(self, entry):
+        rss_before = _current_rss_bytes()
+        start = time.perf_counter()
+        try:
+            entry.value = entry.loader()
+        except Exception as e:
+            entry.error = str(e)
+            raise
+        entry.load_seconds = round(time.perf_counter() - start, 3)
+        rss_after = _current_rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            entry.rss_delta_bytes = max(0, rss_after - rss_before)
+        entry.tensor_bytes = _tensor_bytes(entry.value)
+        entry.error = None
+        entry.loaded = True
+        print(f"✅ Loaded model '{entry.name}' in {entry.load_seconds}s")
+
+    def warmup(self, names=None):
+        """Loads the given models (all by default) and runs their dummy forward pass."""
+        for name in self.names() if names is None else names:
+            entry = self._entries[name]
+            try:
+                self.get(name)
+                if entry.warmup and not entry.warmed:
+                    start = time.perf_counter()
+                    entry.warmup()
+                    entry.warmup_seconds = round(time.perf_counter() - start, 3)
+                entry.warmed = True
+            except Exception as e:
+                entry.error = str(e)
+                print(f"❌ Warmup failed for model '{name}':", e)
+                traceback.print_exc()
+
+    def expect(self, names):
+        """
+        Limits readiness to `names`, the models scheduled for warmup. With
+        an empty list (lazy loading) the process is ready straight away.
+        """
+        self._expected = list(names)
+
+    def is_ready(self):
+        names = self.names() if self._expected is None else self._expected
+        return all(self._entries[n].loaded and self._entries[n].warmed for n in names)
+
+    def status(self):
+        def mb(n):
+            return round(n / (1024 * 1024), 1) if n is not None else None
+
+        return {
+            name: {
+                "loaded": e.loaded,
+                "warmed": e.warmed,
+                "load_seconds": e.load_seconds,
+                "warmup_seconds": e.warmup_seconds,
+                "tensor_mb": mb(e.tensor_bytes),
+                "rss_delta_mb": mb(e.rss_delta_bytes),
+                "error": e.error,
+            }
+            for name, e in self._entries.items()
+        }
@@ -1,31 +1,82 @@
-import torch, torchaudio, subprocess, os, numpy as np, joblib, whisper
-from PIL import Image
-from moviepy import VideoFileClip      
-from pathlib import Path
-from pydub import AudioSegment
+import torch, os, numpy as np, joblib, whisper
 import traceback
+from dataclasses import dataclass
+from typing import Callable
+from PIL import Image
 from transformers import (
     AutoImageProcessor, AutoModelForImageClassification,
     Wav2Vec2Processor, Wav2Vec2Model,
     AutoTokenizer, AutoModelForSequenceClassification
 )
+from utils.media import decode_media, FACE_FRAME_SIZE
+from utils.batching import MicroBatcher
+from utils.model_registry import ModelRegistry
+from utils.inference_backends import INFERENCE_BACKEND, backend_device, load_encoder
+from utils.transcription import (
+    WHISPER_MODEL, WHISPER_LANGUAGE, WHISPER_TEMPERATURE_FALLBACK,
+    TRANSCRIBE_MAX_SECONDS, SILENCE_THRESHOLD_DB, transcribe,
+)
+from utils.inference_cache import InferenceCache, sha256_file, sha256_text, version_hash
+from utils.metrics import stage_timings, timed
+
+# Cross-request micro-batching in front of the three HF encoders
+BATCHING_ENABLED = os.getenv("INFERENCE_BATCHING", "true").lower() in ("1", "true", "yes")
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "10"))
 
-whisper_model = whisper.load_model("base")
+# wav2vec2 runs over fixed-length overlapping windows so memory stays flat
+AUDIO_WINDOW_SECONDS = float(os.getenv("AUDIO_WINDOW_SECONDS", "10"))
+AUDIO_WINDOW_OVERLAP_SECONDS = float(os.getenv("AUDIO_WINDOW_OVERLAP_SECONDS", "1"))
+AUDIO_MAX_SECONDS = float(os.getenv("AUDIO_MAX_SECONDS", "120"))
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
+# What the meta-classifier sees in the video/audio slots of a text-only
+# check-in: "text" repeats the text distribution, "uniform" uses 1/7 each.
+MISSING_MODALITY_FALLBACK = os.getenv("MISSING_MODALITY_FALLBACK", "text").lower()
 
-# Load models once
-face_p = AutoImageProcessor.from_pretrained("dima806/facial_emotions_image_detection")
-face_m = AutoModelForImageClassification.from_pretrained("dima806/facial_emotions_image_detection").to(device)
+device = backend_device()
 
-audio_p = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-base")
-audio_m = Wav2Vec2Model.from_pretrained("facebook/wav2vec2-base").to(device)
+FACE_MODEL_ID = "dima806/facial_emotions_image_detection"
+AUDIO_MODEL_ID = "facebook/wav2vec2-base"
+TEXT_MODEL_ID = "j-hartmann/emotion-english-distilroberta-base"
 
-text_p = AutoTokenizer.from_pretrained("j-hartmann/emotion-english-distilroberta-base")
-text_m = AutoModelForSequenceClassification.from_pretrained("j-hartmann/emotion-english-distilroberta-base").to(device)
 
-model = joblib.load("metamodels/emotion_model.pkl")
-le = joblib.load("metamodels/emotion_encoder.pkl")
+def _load_whisper():
+    return whisper.load_model(WHISPER_MODEL, device=device)
+
+
+def _load_face():
+    return (
+        AutoImageProcessor.from_pretrained(FACE_MODEL_ID),
+        load_encoder("face", FACE_MODEL_ID, AutoModelForImageClassification),
+    )
+
+
+def _load_audio():
+    return (
+        Wav2Vec2Processor.from_pretrained(AUDIO_MODEL_ID),
+        load_encoder("audio", AUDIO_MODEL_ID, Wav2Vec2Model),
+    )
+
+
+def _load_text():
+    return (
+        AutoTokenizer.from_pretrained(TEXT_MODEL_ID),
+        load_encoder("text", TEXT_MODEL_ID, AutoModelForSequenceClassification),
+    )
+
+
+META_FILES = ("metamodels/emotion_model.pkl", "metamodels/emotion_encoder.pkl")
+
+
+def _load_meta():
+    return tuple(joblib.load(path) for path in META_FILES)
+
+
+# Models are loaded on first use or by registry.warmup(), never at import time
+registry = ModelRegistry()
+
+# Per-modality results keyed by video/text content hashes + model version
+cache = InferenceCache()
 
 UNIFIED_LABELS = ['happy', 'sad', 'angry', 'fearful', 'neutral', 'surprise', 'disgust']
 text_map = {
@@ -82,110 +133,553 @@ def get_prediction_probabilities(model, processor, input_data, task_type):
         return {}
 
 
-def confidence_based_override(text_probs):
-    return text_probs.get("disgust", 0) >= 0.80
-
-def get_text_from_video(video_path):
+def get_batch_prediction_probabilities(model, processor, images):
+    """
+    Classifies all sampled frames in one batched forward pass.
+    Returns one probability dict per frame, same shape as the single-image path.
+    """
+    if not images:
+        return []
     try:
-        temp = "temp_audio.wav"
-
-        # ✅ Windows-safe ffmpeg call (no ellipsis)
-        cmd = [
-            "ffmpeg", "-i", str(video_path),
-            "-vn",
-            "-acodec", "pcm_s16le",
-            "-ar", "16000",
-            "-ac", "1",
-            temp,
-            "-y", "-hide_banner", "-loglevel", "error"
+        inputs = processor(images=list(images), return_tensors="pt").to(device)
+        with torch.no_grad():
+            logits = model(**inputs).logits
+        probs = torch.nn.functional.softmax(logits, dim=-1).cpu().numpy()
+        labels = model.config.id2label
+        return [
+            {labels[i]: float(row[i]) for i in range(len(row))}
+            for row in probs
         ]
-        subprocess.run(cmd, check=True)
 
-        result = whisper_model.transcribe(temp)
-        os.remove(temp)
+    except Exception as e:
+        print(f"Error in batched image model: {e}")
+        return []
+
+
+def audio_frame_lengths(config, num_samples):
+    """wav2vec2 output frames per clip, from the conv feature encoder geometry."""
+    lengths = []
+    for n in num_samples:
+        for kernel, stride in zip(config.conv_kernel, config.conv_stride):
+            n = (n - kernel) // stride + 1
+        lengths.append(max(int(n), 1))
+    return lengths
+
+
+def _run_text_batch(texts):
+    text_p, text_m = registry.get("text")
+    inputs = text_p(list(texts), return_tensors="pt", truncation=True, padding=True).to(device)
+    with torch.no_grad():
+        logits = text_m(**inputs).logits
+    probs = torch.nn.functional.softmax(logits, dim=-1).cpu().numpy()
+    labels = text_m.config.id2label
+    return [{labels[i]: float(row[i]) for i in range(len(row))} for row in probs]
+
+
+def audio_windows(waveform, sample_rate=16000):
+    """
+    Splits the (duration-capped) waveform into overlapping windows.
+    Returns (window, overlap_samples) pairs; the overlap at the start of
+    every window after the first is skipped when pooling.
+    """
+    waveform = waveform[: int(AUDIO_MAX_SECONDS * sample_rate)]
+    win = max(1, int(AUDIO_WINDOW_SECONDS * sample_rate))
+    overlap = min(int(AUDIO_WINDOW_OVERLAP_SECONDS * sample_rate), win // 2)
+    if len(waveform) <= win:
+        return [(waveform, 0)]
+
+    windows, start = [], 0
+    while True:
+        windows.append((waveform[start:start + win], overlap if start else 0))
+        if start + win >= len(waveform):
+            return windows
+        start += win - overlap
+
+
+def _encode_audio_windows(windows):
+    """One forward pass over (window, overlap_samples) items of equal length."""
+    audio_p, audio_m = registry.get("audio")
+    waveforms = [w for w, _ in windows]
+    inputs = audio_p(waveforms, sampling_rate=16000, return_tensors="pt")
+    inputs = {k: v.to(device) for k, v in inputs.items()}
+    with torch.no_grad():
+        hidden = audio_m(**inputs).last_hidden_state
+
+    n = audio_frame_lengths(audio_m.config, [len(waveforms[0])])[0]
+    hop = int(np.prod(audio_m.config.conv_stride))
+    out = []
+    for h, (_, overlap) in zip(hidden, windows):
+        h = h[min(overlap // hop, n - 1):n].double().cpu()
+        out.append((h.sum(dim=0).numpy(), (h * h).sum(dim=0).numpy(), h.shape[0]))
+    return out
 
-        return result.get("text", "").strip()
 
+def _run_audio_batch(windows):
+    """
+    Encodes a batch of (window, overlap_samples) items. Returns per-window
+    running statistics (sum, sum of squares, frame count) of the hidden
+    states instead of the states themselves.
+
+    wav2vec2-base takes no attention mask and normalizes with group norm,
+    so zero padding would change the embedding of every shorter window.
+    Windows therefore share a forward pass only with windows of exactly
+    the same sample count (full AUDIO_WINDOW_SECONDS windows all do); a
+    clip's embedding never depends on what it was batched with.
+    """
+    groups = {}
+    for i, (w, _) in enumerate(windows):
+        groups.setdefault(len(w), []).append(i)
+    out = [None] * len(windows)
+    for indices in groups.values():
+        for i, stats in zip(indices, _encode_audio_windows([windows[i] for i in indices])):
+            out[i] = stats
+    return out
+
+
+def pool_audio_stats(stats):
+    """Combines per-window statistics into the mean/std embedding dict."""
+    total = sum(s for s, _, _ in stats)
+    total_sq = sum(sq for _, sq, _ in stats)
+    n = sum(c for _, _, c in stats)
+    mean = total / n
+    var = (total_sq - n * mean * mean) / max(n - 1, 1)
+    emb = np.concatenate([mean, np.sqrt(np.maximum(var, 0.0))])
+    return {label: float(emb[i]) for i, label in enumerate(UNIFIED_LABELS[:len(emb)])}
+
+
+def _run_image_batch(frame_lists):
+    flat = [frame for frames in frame_lists for frame in frames]
+    face_p, face_m = registry.get("face")
+    preds = get_batch_prediction_probabilities(face_m, face_p, flat)
+    if len(preds) != len(flat):
+        return [[] for _ in frame_lists]
+
+    out, i = [], 0
+    for frames in frame_lists:
+        out.append(preds[i:i + len(frames)])
+        i += len(frames)
+    return out
+
+
+text_batcher = MicroBatcher("text", _run_text_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
+audio_batcher = MicroBatcher("audio", _run_audio_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
+# Frames count individually towards the image batch size
+image_batcher = MicroBatcher(
+    "image", _run_image_batch, BATCH_MAX_SIZE * 10, BATCH_MAX_WAIT_MS, size_of=len
+)
+
+
+def _submit(batcher, item, empty):
+    try:
+        return batcher.submit(item)
     except Exception as e:
-        print("❌ Whisper transcription failed:", e)
-        traceback.print_exc()
-        return ""
+        print(f"Error in {batcher.name} model: {e}")
+        return empty
+
 
+def predict_text(text):
+    if BATCHING_ENABLED:
+        return _submit(text_batcher, text, {})
+    text_p, text_m = registry.get("text")
+    return get_prediction_probabilities(text_m, text_p, text, "text")
 
-def extract_features(video_path, text_input):
-    video_path = str(Path(video_path))           # ✅ Normalize safe string path
-    temp_audio_path = "temp_audio.wav"
 
-    # ✅ Windows-safe ffmpeg call (NO shell quoting problems)
+def predict_audio(waveform):
     try:
-        subprocess.run([
-            "ffmpeg", "-i", video_path,
-            "-vn",
-            "-acodec", "pcm_s16le",
-            "-ar", "16000",
-            "-ac", "1",
-            temp_audio_path,
-            "-y", "-hide_banner", "-loglevel", "error"
-        ], check=True)
+        windows = audio_windows(waveform)
+        if BATCHING_ENABLED:
+            stats = audio_batcher.submit_many(windows)
+        else:
+            stats = []
+            for i in range(0, len(windows), BATCH_MAX_SIZE):
+                stats.extend(_run_audio_batch(windows[i:i + BATCH_MAX_SIZE]))
+        return pool_audio_stats(stats)
     except Exception as e:
-        print("\n❌ FFmpeg failed while extracting audio!\n")
-        print("Video path:", video_path)
-        traceback.print_exc()
-        raise
+        print(f"Error in audio model: {e}")
+        return {}
 
-    audio_seg = AudioSegment.from_wav(temp_audio_path)
-    waveform = np.array(audio_seg.get_array_of_samples()).astype(np.float32)
-    os.remove(temp_audio_path)
 
-    audio_raw = get_prediction_probabilities(audio_m, audio_p, waveform, "audio")
-    text_raw = get_prediction_probabilities(text_m, text_p, text_input, "text")
+def predict_frames(frames):
+    if not frames:
+        return []
+    if BATCHING_ENABLED:
+        return _submit(image_batcher, list(frames), [])
+    face_p, face_m = registry.get("face")
+    return get_batch_prediction_probabilities(face_m, face_p, frames)
 
-    with VideoFileClip(video_path) as clip:
-        duration = clip.duration
-        num_frames = min(10, max(5, int(duration)))
-        timestamps = np.linspace(0.1, duration - 0.1, num=num_frames)
 
-        frame_predictions = [
-            get_prediction_probabilities(face_m, face_p, Image.fromarray(clip.get_frame(t)), "image")
-            for t in timestamps
-        ]
+def batching_stats():
+    return {
+        "enabled": BATCHING_ENABLED,
+        "text": text_batcher.stats(),
+        "audio": audio_batcher.stats(),
+        "image": image_batcher.stats(),
+    }
 
-    valid_predictions = [p for p in frame_predictions if p]
 
-    video_raw = {
-        label: np.mean([normalize_probs(p, video_map)[label] for p in valid_predictions])
+def _warmup_whisper():
+    registry.get("whisper").transcribe(np.zeros(16000, dtype=np.float32), fp16=device == "cuda")
+
+
+def _warmup_face():
+    face_p, face_m = registry.get("face")
+    get_batch_prediction_probabilities(face_m, face_p, [Image.new("RGB", (224, 224))])
+
+
+def _warmup_audio():
+    _run_audio_batch([(np.zeros(16000, dtype=np.float32), 0)])
+
+
+def _warmup_text():
+    _run_text_batch(["warming up"])
+
+
+def _warmup_meta():
+    model, _ = registry.get("meta")
+    model.predict_proba([[1.0 / len(UNIFIED_LABELS)] * (3 * len(UNIFIED_LABELS))])
+
+
+registry.register("whisper", _load_whisper, warmup=_warmup_whisper)
+registry.register("face", _load_face, warmup=_warmup_face)
+registry.register("audio", _load_audio, warmup=_warmup_audio)
+registry.register("text", _load_text, warmup=_warmup_text)
+registry.register("meta", _load_meta, warmup=_warmup_meta)
+
+
+def confidence_based_override(text_probs):
+    return text_probs.get("disgust", 0) >= 0.80
+
+def transcribe_media(media):
+    """Silence-trimmed, duration-capped Whisper transcript of the decoded audio."""
+    return transcribe(
+        registry.get("whisper"), media.whisper_audio, media.sample_rate,
+        use_fp16=device == "cuda",
+    )
+
+
+def get_text_from_video(video_path, media=None):
+    try:
+        if media is None:
+            media = decode_media(video_path)
+
+        return transcribe_media(media)
+
+    except Exception as e:
+        print("❌ Whisper transcription failed:", e)
+        traceback.print_exc()
+        return ""
+
+
+class _LazyMedia:
+    """Decodes the video on first access only, so fully cached analyses never run ffmpeg."""
+
+    def __init__(self, video_path, media=None):
+        self.video_path = video_path
+        self._media = media
+
+    def get(self):
+        if self._media is None:
+            with timed("decode"):
+                self._media = decode_media(self.video_path)
+        return self._media
+
+
+_stage_versions = None
+
+
+def stage_versions():
+    """Version hash per cached stage, covering every setting that stage depends on."""
+    global _stage_versions
+    if _stage_versions is None:
+        versions = {
+            "transcript": version_hash([
+                WHISPER_MODEL, WHISPER_LANGUAGE, WHISPER_TEMPERATURE_FALLBACK,
+                TRANSCRIBE_MAX_SECONDS, SILENCE_THRESHOLD_DB,
+            ]),
+            "audio": version_hash([
+                INFERENCE_BACKEND, AUDIO_MODEL_ID,
+                AUDIO_WINDOW_SECONDS, AUDIO_WINDOW_OVERLAP_SECONDS, AUDIO_MAX_SECONDS,
+            ]),
+            "face": version_hash([INFERENCE_BACKEND, FACE_MODEL_ID, FACE_FRAME_SIZE]),
+            "text": version_hash([INFERENCE_BACKEND, TEXT_MODEL_ID]),
+        }
+        meta = [(os.path.getsize(p), os.path.getmtime(p)) for p in META_FILES if os.path.exists(p)]
+        versions["result"] = version_hash([versions, meta])
+        _stage_versions = versions
+    return _stage_versions
+
+
+def _cached_stage(stage, content_hashes, compute, valid=bool):
+    """Returns the cached output of a stage, computing and storing it on a miss."""
+    if not content_hashes:
+        return compute()
+    key = cache.key(stage, stage_versions()[stage], *content_hashes)
+    value = cache.get(key)
+    if value is not None:
+        return value
+    value = compute()
+    if valid(value):
+        cache.set(key, value)
+    return value
+
+
+def _average_frames(frame_predictions):
+    valid_predictions = [p for p in frame_predictions if p]
+    return {
+        label: float(np.mean([normalize_probs(p, video_map)[label] for p in valid_predictions]))
         for label in UNIFIED_LABELS
     }
 
-    audio = renormalize(audio_raw)
-    text = renormalize(normalize_probs(text_raw, text_map))
-    video = renormalize(normalize_probs(video_raw, video_map))
 
-    if confidence_based_override(text):
-        for label in UNIFIED_LABELS:
-            val = 1.0 if label == 'disgust' else 0.0
-            audio[label] = val
-            video[label] = val
-            text[label] = val
+@dataclass
+class ShortCircuitRule:
+    """
+    Declares when the modalities computed so far already decide the
+    outcome. `needs` lists the modalities `applies(outputs)` looks at;
+    once it returns True, `resolve(outputs)` supplies the final video,
+    audio and text vectors and the remaining stages are skipped.
+    """
+    name: str
+    needs: tuple
+    applies: Callable
+    resolve: Callable
+
+
+def _one_hot(label):
+    return {l: 1.0 if l == label else 0.0 for l in UNIFIED_LABELS}
+
+
+# Text disgust >= 0.80 overrides every modality with one-hot disgust
+DISGUST_OVERRIDE = ShortCircuitRule(
+    name="text_disgust_override",
+    needs=("text",),
+    applies=lambda outputs: confidence_based_override(outputs["text"]),
+    resolve=lambda outputs: {m: _one_hot("disgust") for m in ("video", "audio", "text")},
+)
+
+SHORT_CIRCUIT_RULES = [DISGUST_OVERRIDE]
+
+# Cheapest first, so a rule can fire before the expensive stages run
+MODALITY_ORDER = ("text", "audio", "video")
+
+
+def _modality(name, source, text_input, video_key):
+    """One normalized modality vector, served from the cache when possible."""
+    video_hashes = [video_key] if video_key else []
 
+    if name == "text":
+        def compute_text():
+            with timed("text"):
+                return predict_text(text_input)
+
+        text_raw = _cached_stage(
+            "text", [sha256_text(text_input)] if cache.enabled else [], compute_text
+        )
+        return renormalize(normalize_probs(text_raw, text_map))
+
+    # Decoding is timed separately, so the model stages exclude it
+    if name == "audio":
+        def compute_audio():
+            waveform = source.get().waveform
+            with timed("audio"):
+                return predict_audio(waveform)
+
+        audio_raw = _cached_stage("audio", video_hashes, compute_audio)
+        return renormalize(audio_raw)
+
+    def compute_face():
+        frames = source.get().frames
+        with timed("face"):
+            return _average_frames(predict_frames(frames))
+
+    video_raw = _cached_stage(
+        "face", video_hashes, compute_face,
+        valid=lambda v: bool(v) and not any(np.isnan(x) for x in v.values()),
+    )
+    return renormalize(normalize_probs(video_raw, video_map))
+
+
+def _short_circuit(outputs):
+    for rule in SHORT_CIRCUIT_RULES:
+        if set(rule.needs) <= outputs.keys() and rule.applies(outputs):
+            return rule
+    return None
+
+
+def evaluate_modalities(source, text_input, video_key=None, order=MODALITY_ORDER, on_partial=None):
+    """
+    Computes modality vectors in `order`, checking SHORT_CIRCUIT_RULES after
+    each one. Returns ({video, audio, text} vectors, name of the rule that
+    fired or None). `on_partial(stage, result)` gets a provisional result
+    after every modality but the last (see provisional_result).
+    """
+    outputs = {}
+    for name in order:
+        outputs[name] = _modality(name, source, text_input, video_key)
+        rule = _short_circuit(outputs)
+        if rule:
+            return rule.resolve(outputs), rule.name
+        if on_partial and len(outputs) < len(order):
+            try:
+                on_partial(name, provisional_result(outputs))
+            except Exception as e:
+                # Provisional results are best-effort; the analysis carries on
+                print(f"⚠️ Provisional result after {name} failed:", e)
+    return outputs, None
+
+
+def provisional_result(outputs):
+    """
+    Meta-classifier result from the modalities finished so far, with the
+    missing slots filled like a text-only check-in (MISSING_MODALITY_FALLBACK,
+    or the mean of the finished modalities when there's no text yet).
+    """
+    if "text" in outputs:
+        fallback = missing_modality(outputs["text"])
+    else:
+        done = list(outputs.values())
+        fallback = {label: sum(o[label] for o in done) / len(done) for label in UNIFIED_LABELS}
+    filled = {name: outputs.get(name, fallback) for name in ("video", "audio", "text")}
+    return _classify(feature_vector(filled), stage="provisional")
+
+
+def feature_vector(outputs):
     return (
-        [video[label] for label in UNIFIED_LABELS] +
-        [audio[label] for label in UNIFIED_LABELS] +
-        [text[label] for label in UNIFIED_LABELS]
+        [outputs["video"][label] for label in UNIFIED_LABELS] +
+        [outputs["audio"][label] for label in UNIFIED_LABELS] +
+        [outputs["text"][label] for label in UNIFIED_LABELS]
     )
 
 
-def predict_emotion(video_path, text_input):
-    if not text_input or text_input.strip() == "":
-        text_input = get_text_from_video(video_path)
-    features = extract_features(video_path, text_input)
-    probs = model.predict_proba([features])[0]
+def extract_features(video_path, text_input, media=None, video_key=None):
+    source = media if isinstance(media, _LazyMedia) else _LazyMedia(video_path, media)
+    outputs, _ = evaluate_modalities(source, text_input, video_key)
+    return feature_vector(outputs)
+
+
+def _classify(features, stage="meta"):
+    model, le = registry.get("meta")
+    with timed(stage):
+        probs = model.predict_proba([features])[0]
     pred_index = np.argmax(probs)
     pred_label = le.inverse_transform([pred_index])[0]
     confidence = probs[pred_index] * 100
 
     return {
-        "predicted_emotion": pred_label,
-        "confidence": round(confidence, 2),
-        "probabilities": {le.classes_[i]: float(probs[i]) for i in range(len(probs))}
+        "predicted_emotion": str(pred_label),
+        "confidence": float(round(confidence, 2)),
+        "probabilities": {str(le.classes_[i]): float(probs[i]) for i in range(len(probs))},
+    }
+
+
+def missing_modality(text):
+    """Stand-in distribution for the absent video and audio slots."""
+    if MISSING_MODALITY_FALLBACK == "uniform":
+        return {label: 1.0 / len(UNIFIED_LABELS) for label in UNIFIED_LABELS}
+    return dict(text)
+
+
+def predict_text_only(text_input):
+    """
+    Text-only analysis: runs just the DistilRoBERTa encoder and feeds the
+    meta-classifier the MISSING_MODALITY_FALLBACK for video and audio.
+    """
+    if not text_input or not text_input.strip():
+        raise ValueError("Text-only analysis needs some text")
+
+    text = _modality("text", None, text_input, None)
+    if not any(text.values()):
+        raise RuntimeError("Text model failed")
+
+    outputs = {"text": text}
+    rule = _short_circuit(outputs)
+    if rule:
+        outputs = rule.resolve(outputs)
+    else:
+        fallback = missing_modality(text)
+        outputs.update(video=fallback, audio=fallback)
+
+    return {**_classify(feature_vector(outputs)), "transcript": None,
+            "short_circuit": rule.name if rule else None}
+
+
+def model_versions():
+    """Which models and settings produced a result, stored next to its timings."""
+    return {
+        "backend": INFERENCE_BACKEND,
+        "whisper": WHISPER_MODEL,
+        "face": FACE_MODEL_ID,
+        "audio": AUDIO_MODEL_ID,
+        "text": TEXT_MODEL_ID,
+        "stages": stage_versions(),
     }
+
+
+def predict_emotion(video_path, text_input, transcript=None, on_transcript=None, media=None, on_partial=None):
+    """
+    Runs the analysis and adds `metrics`: wall time per stage that actually
+    ran (decode, transcription, audio, face, text, meta; cache hits are
+    absent), the total, and model_versions().
+    """
+    with stage_timings() as timings:
+        with timed("total"):
+            result = _predict_emotion(video_path, text_input, transcript, on_transcript, media, on_partial)
+    return {**result, "metrics": {"stages_ms": timings, "models": model_versions()}}
+
+
+def _predict_emotion(video_path, text_input, transcript=None, on_transcript=None, media=None,
+                     on_partial=None):
+    """
+    `transcript` is a transcript stored by an earlier attempt; when given,
+    Whisper is skipped. `media` is an already decoded DecodedMedia (e.g.
+    from a chunked upload); without it the video is decoded on demand.
+    `on_transcript(text)` is called as soon as a fresh transcript exists,
+    so it can be persisted even if a later stage fails. `on_partial(stage,
+    result)` receives a provisional result as each modality finishes.
+
+    Every stage (transcript, audio, face, text and the final result) is
+    looked up in the content-addressed inference cache first; the video is
+    only decoded if some stage actually has to run.
+    """
+    if not video_path:
+        return predict_text_only(text_input)
+
+    # Decode at most once; transcription, audio and face stages share the result
+    source = _LazyMedia(video_path, media)
+    video_key = sha256_file(video_path) if cache.enabled else None
+
+    if not text_input or text_input.strip() == "":
+        if transcript is None:
+            key = cache.key("transcript", stage_versions()["transcript"], video_key) if video_key else None
+            transcript = cache.get(key) if key else None
+            if transcript is None:
+                try:
+                    media = source.get()
+                    with timed("transcription"):
+                        transcript = transcribe_media(media)
+                    if key:
+                        cache.set(key, transcript)
+                except Exception as e:
+                    print("❌ Whisper transcription failed:", e)
+                    traceback.print_exc()
+            if transcript is not None and on_transcript:
+                on_transcript(transcript)
+        text_input = transcript or ""
+
+    result_key = (
+        cache.key("result", stage_versions()["result"], video_key, sha256_text(text_input))
+        if video_key else None
+    )
+    cached = cache.get(result_key) if result_key else None
+    if cached is not None:
+        return {**cached, "transcript": transcript}
+
+    outputs, short_circuit = evaluate_modalities(source, text_input, video_key, on_partial=on_partial)
+    result = {**_classify(feature_vector(outputs)), "short_circuit": short_circuit}
+    if result_key:
+        cache.set(result_key, result)
+    return {**result, "transcript": transcript}
+
+
+def cache_stats():
+    return cache.stats()
@@ -0,0 +1,241 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import text, update
+
+import models
+from db import SessionLocal, engine
+from utils.upload_sessions import reap_sessions
+from config import (
+    MEDIA_RETENTION, MEDIA_COMPACT_AFTER_HOURS, MEDIA_DROP_AFTER_DAYS, MEDIA_QUOTA_MB,
+    MEDIA_SWEEP_INTERVAL_SECONDS, MEDIA_SWEEP_BATCH,
+)
+
+PROXY_SUFFIX = ".proxy.mp4"
+# Small enough to keep, still good enough to re-run the pipeline on
+PROXY_ARGS = [
+    "-vf", "scale=-2:240", "-r", "10",
+    "-c:v", "libx264", "-preset", "veryfast", "-crf", "32", "-maxrate", "200k", "-bufsize", "400k",
+    "-c:a", "aac", "-ac", "1", "-ar", "16000", "-b:a", "32k",
+    "-movflags", "+faststart", "-threads", "1",
+]
+# Pause between files so the sweeper never saturates the disk
+PAUSE_SECONDS = 0.5
+STALE_PART_AGE = timedelta(days=1)
+# Arbitrary key for pg_try_advisory_lock: one sweeper at a time across API processes
+SWEEP_LOCK_KEY = 0x6E657869
+# Idle chunked-upload sessions are reaped this often, whatever MEDIA_RETENTION is
+SESSION_REAP_INTERVAL_SECONDS = 60
+
+
+def _low_priority(cmd):
+    """Runs ffmpeg at idle I/O and low CPU priority where the tools exist."""
+    if shutil.which("ionice"):
+        cmd = ["ionice", "-c", "3"] + cmd
+    if shutil.which("nice"):
+        cmd = ["nice", "-n", "10"] + cmd
+    return cmd
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _swap_video_path(db, entry_id, old_path, new_path) -> bool:
+    """Compare-and-swap on video_path, so a row changed meanwhile is left alone."""
+    result = db.execute(
+        update(models.MoodEntry)
+        .where(models.MoodEntry.id == entry_id, models.MoodEntry.video_path == old_path)
+        .values(video_path=new_path)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def make_proxy(path: str) -> str:
+    """Transcodes `path` to a low-bitrate proxy next to it and returns the proxy's path."""
+    base = os.path.splitext(path)[0]
+    proxy = base + PROXY_SUFFIX
+    tmp = base + ".proxy.part.mp4"
+    cmd = _low_priority([
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", path, *PROXY_ARGS, tmp,
+    ])
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        os.replace(tmp, proxy)
+    except Exception:
+        _remove(tmp)
+        raise
+    return proxy
+
+
+def compact_entry(db, entry_id: int, path: str) -> int:
+    """Replaces an analyzed video with its proxy. Returns bytes freed."""
+    before = os.path.getsize(path)
+    proxy = make_proxy(path)
+
+    # The row points at the proxy before the original disappears
+    if not _swap_video_path(db, entry_id, path, proxy):
+        _remove(proxy)
+        return 0
+    _remove(path)
+    return max(0, before - os.path.getsize(proxy))
+
+
+def drop_entry(db, entry_id: int, path: str) -> int:
+    """Forgets the video; emotion, probabilities and transcript stay. Returns bytes freed."""
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if not _swap_video_path(db, entry_id, path, None):
+        return 0
+    _remove(path)
+    return size
+
+
+def _analyzed_with_video(db):
+    return (
+        db.query(models.MoodEntry.id, models.MoodEntry.video_path)
+        .filter(models.MoodEntry.status == models.EntryStatus.analyzed)
+        .filter(models.MoodEntry.video_path.isnot(None))
+    )
+
+
+def _uploads_size(upload_dir):
+    """Bytes under upload_dir, including in-progress chunked uploads in sessions/."""
+    total = 0
+    for root, _, names in os.walk(upload_dir):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _clean_partials(upload_dir):
+    """Removes .part files left behind by interrupted uploads or transcodes."""
+    cutoff = time.time() - STALE_PART_AGE.total_seconds()
+    for name in os.listdir(upload_dir):
+        path = os.path.join(upload_dir, name)
+        if ".part" in name and os.path.getmtime(path) < cutoff:
+            _remove(path)
+
+
+def sweep_once(upload_dir: str) -> dict:
+    """
+    One bounded pass: compacts (or drops) up to MEDIA_SWEEP_BATCH analyzed
+    videos past MEDIA_COMPACT_AFTER_HOURS, drops videos older than
+    MEDIA_DROP_AFTER_DAYS, then drops the oldest videos while the uploads
+    directory exceeds MEDIA_QUOTA_MB.
+    """
+    stats = {"compacted": 0, "dropped": 0, "freed_mb": 0.0, "errors": 0}
+    freed = 0
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        budget = MEDIA_SWEEP_BATCH
+
+        def handle(action, entry_id, path):
+            nonlocal freed, budget
+            budget -= 1
+            try:
+                if not os.path.exists(path):
+                    _swap_video_path(db, entry_id, path, None)
+                    return
+                freed += action(db, entry_id, path)
+                stats["compacted" if action is compact_entry else "dropped"] += 1
+            except Exception as e:
+                db.rollback()
+                stats["errors"] += 1
+                print(f"❌ Media retention failed for entry {entry_id}:", e)
+            time.sleep(PAUSE_SECONDS)
+
+        if MEDIA_DROP_AFTER_DAYS > 0:
+            rows = (
+                _analyzed_with_video(db)
+                .filter(models.MoodEntry.created_at < now - timedelta(days=MEDIA_DROP_AFTER_DAYS))
+                .order_by(models.MoodEntry.created_at)
+                .limit(budget)
+                .all()
+            )
+            for entry_id, path in rows:
+                handle(drop_entry, entry_id, path)
+
+        if budget > 0 and MEDIA_RETENTION in ("proxy", "drop"):
+            action = compact_entry if MEDIA_RETENTION == "proxy" else drop_entry
+            query = (
+                _analyzed_with_video(db)
+                .filter(models.MoodEntry.created_at < now - timedelta(hours=MEDIA_COMPACT_AFTER_HOURS))
+            )
+            if action is compact_entry:
+                query = query.filter(~models.MoodEntry.video_path.like(f"%{PROXY_SUFFIX}"))
+            for entry_id, path in query.order_by(models.MoodEntry.created_at).limit(budget).all():
+                handle(action, entry_id, path)
+
+        if MEDIA_QUOTA_MB > 0:
+            over = _uploads_size(upload_dir) - int(MEDIA_QUOTA_MB * 1024 * 1024)
+            if over > 0:
+                rows = _analyzed_with_video(db).order_by(models.MoodEntry.created_at).limit(MEDIA_SWEEP_BATCH).all()
+                for entry_id, path in rows:
+                    if over <= 0:
+                        break
+                    before = freed
+                    handle(drop_entry, entry_id, path)
+                    over -= freed - before
+
+        _clean_partials(upload_dir)
+    finally:
+        db.close()
+
+    stats["freed_mb"] = round(freed / (1024 * 1024), 2)
+    return stats
+
+
+def _locked_sweep(upload_dir):
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": SWEEP_LOCK_KEY}).scalar():
+            return None  # another process is sweeping
+        try:
+            return sweep_once(upload_dir)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": SWEEP_LOCK_KEY})
+
+
+def start_sweeper(upload_dir: str):
+    """
+    Background thread that reaps idle upload sessions every
+    SESSION_REAP_INTERVAL_SECONDS and, when retention is enabled, runs a
+    media sweep every MEDIA_SWEEP_INTERVAL_SECONDS.
+    """
+    retention = MEDIA_RETENTION != "off" or MEDIA_DROP_AFTER_DAYS > 0 or MEDIA_QUOTA_MB > 0
+
+    def loop():
+        next_sweep = time.monotonic()
+        while True:
+            # Every worker reaps: streaming decoders live in the process that opened the session
+            try:
+                reaped = reap_sessions(upload_dir)
+                if reaped:
+                    print(f"🧹 Reaped {reaped} idle upload session(s)")
+            except Exception:
+                traceback.print_exc()
+            if retention and time.monotonic() >= next_sweep:
+                next_sweep = time.monotonic() + MEDIA_SWEEP_INTERVAL_SECONDS
+                try:
+                    stats = _locked_sweep(upload_dir)
+                    if stats and (stats["compacted"] or stats["dropped"]):
+                        print(f"🧹 Media retention: {stats}")
+                except Exception:
+                    traceback.print_exc()
+            time.sleep(SESSION_REAP_INTERVAL_SECONDS)
+
+    thread = threading.Thread(target=loop, name="media-sweeper", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,67 @@
+import os
+import numpy as np
+
+# Whisper settings
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")               # tiny | base | small | medium | ...
+WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE") or None         # e.g. "en"; None = auto-detect
+WHISPER_TEMPERATURE_FALLBACK = os.getenv("WHISPER_TEMPERATURE_FALLBACK", "true").lower() in ("1", "true", "yes")
+
+# Silence trimming / duration cap
+TRANSCRIBE_MAX_SECONDS = float(os.getenv("TRANSCRIBE_MAX_SECONDS", "60"))
+SILENCE_THRESHOLD_DB = float(os.getenv("SILENCE_THRESHOLD_DB", "-40"))   # dBFS below which a frame is silent
+MIN_SPEECH_SECONDS = 0.3
+FRAME_MS = 30
+PAD_MS = 200
+
+
+def speech_mask(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Per-sample boolean mask of voiced audio from a short-time energy pass.
+    Voiced frames are padded by PAD_MS on both sides so word onsets and
+    endings aren't clipped.
+    """
+    frame = max(1, int(sample_rate * FRAME_MS / 1000))
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(len(audio), dtype=bool)
+
+    frames = audio[: n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    db = 20 * np.log10(np.maximum(rms, 1e-10))
+    voiced = db > SILENCE_THRESHOLD_DB
+
+    pad = int(np.ceil(PAD_MS / FRAME_MS))
+    if pad and voiced.any():
+        voiced = np.convolve(voiced.astype(np.int32), np.ones(2 * pad + 1, dtype=np.int32), mode="same") > 0
+
+    mask = np.repeat(voiced, frame)
+    return np.concatenate([mask, np.zeros(len(audio) - len(mask), dtype=bool)])
+
+
+def prepare_audio(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Drops silent stretches and caps the audio at TRANSCRIBE_MAX_SECONDS."""
+    voiced = audio[speech_mask(audio, sample_rate)]
+    max_samples = int(TRANSCRIBE_MAX_SECONDS * sample_rate)
+    if max_samples > 0:
+        voiced = voiced[:max_samples]
+    return voiced
+
+
+def transcribe(whisper_model, audio: np.ndarray, sample_rate: int, use_fp16: bool = False) -> str:
+    """
+    Transcribes float32 audio in [-1, 1]. Returns "" without running
+    Whisper at all when the clip has no speech.
+    """
+    speech = prepare_audio(audio, sample_rate)
+    if len(speech) < MIN_SPEECH_SECONDS * sample_rate:
+        return ""
+
+    options = {"fp16": use_fp16}
+    if WHISPER_LANGUAGE:
+        options["language"] = WHISPER_LANGUAGE
+    if not WHISPER_TEMPERATURE_FALLBACK:
+        # Single greedy pass instead of re-decoding at higher temperatures
+        options["temperature"] = 0.0
+
+    result = whisper_model.transcribe(speech.astype(np.float32), **options)
+    return result.get("text", "").strip()
@@ -0,0 +1,273 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from config import (
+    MAX_UPLOAD_MB, ANALYSIS_MODE, INFERENCE_SERVER,
+    UPLOAD_SESSIONS_PER_USER, UPLOAD_SESSIONS_MAX, UPLOAD_SESSION_IDLE_MINUTES, UPLOAD_CHUNK_MAX_MB,
+)
+from utils.inference_cache import remember_file_hash
+from utils.media import StreamingDecoder
+from utils.uploads import ALLOWED_EXTENSIONS, check_media
+
+# Sessions without a new chunk for this long are reaped by the sweeper
+SESSION_IDLE_SECONDS = UPLOAD_SESSION_IDLE_MINUTES * 60
+# Retry-After for a refused session: about when the sweeper frees one
+SESSION_RETRY_AFTER_SECONDS = 60
+DATA_FILE = "data.part"
+META_FILE = "meta.json"
+COMPLETE_MARKER = "complete"
+
+# Decoders live in the process that created the session. Without
+# sticky routing a finalize on another worker just decodes the file.
+_decoders = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _streaming_decode_enabled():
+    # Decoded media can only be handed to an analysis running in this process
+    return ANALYSIS_MODE != "queue" and not INFERENCE_SERVER
+
+
+def _session_dir(upload_dir, upload_id):
+    try:
+        uuid.UUID(upload_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return os.path.join(upload_dir, "sessions", upload_id)
+
+
+def _lock(upload_id):
+    with _registry_lock:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def _load(upload_dir, upload_id, user_id):
+    directory = _session_dir(upload_dir, upload_id)
+    try:
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if meta["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return directory, meta
+
+
+def _offset(directory):
+    try:
+        return os.path.getsize(os.path.join(directory, DATA_FILE))
+    except OSError:
+        return 0
+
+
+def _last_activity(directory):
+    """Newest mtime of the session: a chunk, its creation or the finalize marker."""
+    times = []
+    for path in (directory, os.path.join(directory, DATA_FILE), os.path.join(directory, META_FILE)):
+        try:
+            times.append(os.path.getmtime(path))
+        except OSError:
+            pass
+    return max(times, default=0)
+
+
+def _open_sessions(upload_dir):
+    """(session dir, owner id) of every session on disk, across API workers."""
+    root = os.path.join(upload_dir, "sessions")
+    if not os.path.isdir(root):
+        return []
+    sessions = []
+    for name in os.listdir(root):
+        try:
+            with open(os.path.join(root, name, META_FILE)) as f:
+                sessions.append((name, json.load(f)["user_id"]))
+        except (OSError, ValueError, KeyError):
+            # Being created or removed right now; still counts towards the total
+            sessions.append((name, None))
+    return sessions
+
+
+def reap_sessions(upload_dir):
+    """
+    Stops decoders whose session another worker finalized or aborted and
+    removes sessions idle for more than UPLOAD_SESSION_IDLE_MINUTES.
+    Called from the sweeper thread (utils/retention.py).
+    """
+    root = os.path.join(upload_dir, "sessions")
+    with _registry_lock:
+        gone = [uid for uid in _decoders if not os.path.isdir(os.path.join(root, uid))]
+        for uid in gone:
+            _decoders.pop(uid).abort()
+            _locks.pop(uid, None)
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - SESSION_IDLE_SECONDS
+    reaped = 0
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if _last_activity(path) >= cutoff:
+            continue
+        with _registry_lock:
+            decoder = _decoders.pop(name, None)
+            _locks.pop(name, None)
+        if decoder:
+            decoder.abort()
+        shutil.rmtree(path, ignore_errors=True)
+        reaped += 1
+    return reaped
+
+
+def create_session(upload_dir, user_id, filename):
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in (filename or "") else "webm"
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Unsupported file format")
+
+    # Each session may hold an ffmpeg process, so both counts are capped;
+    # the lock keeps concurrent requests in this worker from both passing
+    with _registry_lock:
+        sessions = _open_sessions(upload_dir)
+        mine = sum(1 for _, owner in sessions if owner == user_id)
+        if mine >= UPLOAD_SESSIONS_PER_USER or len(sessions) >= UPLOAD_SESSIONS_MAX:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many uploads in progress. Please try again shortly.",
+                headers={"Retry-After": str(SESSION_RETRY_AFTER_SECONDS)},
+            )
+        upload_id = str(uuid.uuid4())
+        directory = _session_dir(upload_dir, upload_id)
+        os.makedirs(directory)
+        open(os.path.join(directory, DATA_FILE), "wb").close()
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump({"user_id": user_id, "ext": ext, "created_at": time.time()}, f)
+
+    if _streaming_decode_enabled():
+        marker = os.path.join(directory, COMPLETE_MARKER)
+        decoder = StreamingDecoder(
+            os.path.join(directory, DATA_FILE),
+            # Also stop if the session was finalized or aborted by another worker
+            lambda: os.path.exists(marker) or not os.path.isdir(directory),
+            idle_timeout=SESSION_IDLE_SECONDS,
+        ).start()
+        with _registry_lock:
+            _decoders[upload_id] = decoder
+    return upload_id
+
+
+def session_status(upload_dir, upload_id, user_id):
+    directory, _ = _load(upload_dir, upload_id, user_id)
+    return {
+        "upload_id": upload_id,
+        "offset": _offset(directory),
+        "complete": os.path.exists(os.path.join(directory, COMPLETE_MARKER)),
+    }
+
+
+async def append_chunk(upload_dir, upload_id, user_id, offset, request):
+    """
+    Writes the request body at `offset` piece by piece as it arrives, so no
+    chunk is held in memory. A mismatched offset (a retried or out-of-order
+    chunk), or a PUT while another one for the session is still being
+    written, is answered with 409 and the offset to resume from. Bytes
+    written before a dropped connection are kept; GET reports the offset.
+    """
+    directory, _ = _load(upload_dir, upload_id, user_id)
+    marker = os.path.join(directory, COMPLETE_MARKER)
+    if os.path.exists(marker):
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+
+    max_chunk = int(UPLOAD_CHUNK_MAX_MB * 1024 * 1024)
+    max_bytes = int(MAX_UPLOAD_MB * 1024 * 1024)
+    chunk_too_large = HTTPException(status_code=413, detail=f"Chunk too large (max {UPLOAD_CHUNK_MAX_MB:g} MB).")
+    too_large = HTTPException(status_code=413, detail=f"The video is too large (max {MAX_UPLOAD_MB:g} MB).")
+    length = request.headers.get("content-length", "")
+    if length.isdigit():
+        if max_chunk and int(length) > max_chunk:
+            raise chunk_too_large
+        if max_bytes and offset + int(length) > max_bytes:
+            raise too_large
+
+    # One writer per session at a time; finalize waits for it
+    lock = _lock(upload_id)
+    if not lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Another chunk is being written", "offset": _offset(directory)},
+        )
+    try:
+        current = await run_in_threadpool(_offset, directory)
+        if offset != current:
+            raise HTTPException(status_code=409, detail={"message": "Offset mismatch", "offset": current})
+        if os.path.exists(marker):
+            raise HTTPException(status_code=409, detail="Upload already finalized")
+
+        written = 0
+        f = await run_in_threadpool(open, os.path.join(directory, DATA_FILE), "ab")
+        try:
+            async for part in request.stream():
+                written += len(part)
+                if max_chunk and written > max_chunk:
+                    raise chunk_too_large
+                if max_bytes and offset + written > max_bytes:
+                    raise too_large
+                await run_in_threadpool(f.write, part)
+        finally:
+            await run_in_threadpool(f.close)
+    finally:
+        lock.release()
+    return {"upload_id": upload_id, "offset": offset + written}
+
+
+def finalize_session(upload_dir, upload_id, user_id):
+    """
+    Marks the upload complete, validates the file with ffprobe and moves it
+    into upload_dir. Returns (video_path, media); media is the already
+    decoded DecodedMedia when this process streamed the upload, else None.
+    Blocking; call from the threadpool.
+    """
+    directory, meta = _load(upload_dir, upload_id, user_id)
+    data = os.path.join(directory, DATA_FILE)
+    with _lock(upload_id):
+        if _offset(directory) == 0:
+            raise HTTPException(status_code=400, detail="Upload is empty")
+        open(os.path.join(directory, COMPLETE_MARKER), "w").close()
+
+    with _registry_lock:
+        decoder = _decoders.pop(upload_id, None)
+        _locks.pop(upload_id, None)
+
+    try:
+        check_media(data)
+    except HTTPException:
+        if decoder:
+            decoder.abort()
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    media = decoder.finish() if decoder else None
+    path = os.path.join(upload_dir, f"{upload_id}.{meta['ext']}")
+    os.replace(data, path)
+    shutil.rmtree(directory, ignore_errors=True)
+
+    if media is not None:
+        media.video_path = path
+        if decoder.bytes_fed == os.path.getsize(path):
+            remember_file_hash(path, decoder.sha256.hexdigest())
+    return path, media
+
+
+def abort_session(upload_dir, upload_id, user_id):
+    directory, _ = _load(upload_dir, upload_id, user_id)
+    with _registry_lock:
+        decoder = _decoders.pop(upload_id, None)
+        _locks.pop(upload_id, None)
+    if decoder:
+        decoder.abort()
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from config import MAX_UPLOAD_MB, MAX_VIDEO_SECONDS
+from utils.inference_cache import remember_file_hash
+from utils.media import probe, packet_duration
+
+ALLOWED_EXTENSIONS = ["mp4", "mov", "avi", "mkv", "webm"]
+CHUNK_SIZE = 1 << 20
+# Room for the multipart boundaries and the other form fields around the video
+FORM_OVERHEAD_BYTES = 1 << 20
+
+
+def _too_large():
+    return HTTPException(status_code=413, detail=f"The video is too large (max {MAX_UPLOAD_MB:g} MB).")
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware that refuses request bodies over MAX_UPLOAD_MB before
+    Starlette spools them: from Content-Length when the client sends it,
+    otherwise as soon as the running byte count passes the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.max_bytes = int(MAX_UPLOAD_MB * 1024 * 1024) + FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not MAX_UPLOAD_MB:
+            return await self.app(scope, receive, send)
+
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": _too_large().detail})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+@dataclass
+class SavedUpload:
+    path: str
+    size: int
+    sha256: str
+    duration: float = None   # from the header, else the last audio packet; None if neither is known
+
+
+def _extension(filename: str) -> str:
+    ext = (filename or "").rsplit(".", 1)[-1].lower() if "." in (filename or "") else ""
+    if ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Unsupported file format")
+    return ext
+
+
+def _write_chunk(f, digest, chunk):
+    digest.update(chunk)
+    f.write(chunk)
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def check_media(path: str) -> dict:
+    """ffprobe sanity check: a readable container with an audio track and a sane duration."""
+    try:
+        info = probe(path)
+    except Exception:
+        raise HTTPException(status_code=400, detail="The uploaded file is not a readable video.")
+    if not info["has_audio"]:
+        raise HTTPException(status_code=400, detail="The video has no audio track.")
+    duration = info["duration"]
+    if duration is None:
+        # MediaRecorder webm has no duration in its header; use the last audio packet
+        try:
+            duration = info["duration"] = packet_duration(path)
+        except Exception:
+            raise HTTPException(status_code=400, detail="The uploaded file is not a readable video.")
+    if duration is not None and duration <= 0:
+        raise HTTPException(status_code=400, detail="The video is empty.")
+    if duration is not None and MAX_VIDEO_SECONDS and duration > MAX_VIDEO_SECONDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"The video is too long (max {int(MAX_VIDEO_SECONDS)} seconds).",
+        )
+    return info
+
+
+async def save_upload(video_file: UploadFile, upload_dir: str) -> SavedUpload:
+    """
+    Streams an upload to `upload_dir` in CHUNK_SIZE pieces, hashing as it
+    goes; file I/O and ffprobe run in the threadpool, never on the event
+    loop. Oversized, unsupported or unreadable videos raise HTTPException
+    and leave nothing on disk. Requests far over the limit never get here:
+    UploadSizeLimit refuses them while they are still arriving.
+    """
+    ext = _extension(video_file.filename)
+    max_bytes = int(MAX_UPLOAD_MB * 1024 * 1024)
+    too_large = _too_large()
+    if max_bytes and video_file.size is not None and video_file.size > max_bytes:
+        raise too_large
+
+    path = os.path.join(upload_dir, f"{uuid.uuid4()}.{ext}")
+    partial = path + ".part"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        f = await run_in_threadpool(open, partial, "wb")
+        try:
+            while True:
+                chunk = await video_file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise too_large
+                await run_in_threadpool(_write_chunk, f, digest, chunk)
+        finally:
+            await run_in_threadpool(f.close)
+
+        info = await run_in_threadpool(check_media, partial)
+        await run_in_threadpool(os.replace, partial, path)
+    except HTTPException:
+        await run_in_threadpool(_discard, partial)
+        raise
+    except Exception as e:
+        await run_in_threadpool(_discard, partial)
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+
+    sha256 = digest.hexdigest()
+    remember_file_hash(path, sha256)  # the inference cache won't re-read the file
+    return SavedUpload(path=path, size=size, sha256=sha256, duration=info["duration"])
@@ -0,0 +1,99 @@
+# backend/worker.py
+"""
+Standalone analysis workers.
+
+    python worker.py --processes 4
+
+Each process claims `uploaded` MoodEntry rows with
+SELECT ... FOR UPDATE SKIP LOCKED, runs the emotion pipeline and stores
+the result. Leases are renewed by heartbeat; if a worker crashes its
+lease expires and another worker picks the entry up again. Run the API
+with ANALYSIS_MODE=queue so it leaves analysis to these processes.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import traceback
+
+
+def _worker_main(index: int, poll_interval: float, threads: int, warmup: bool):
+    # Imported here so every spawned process builds its own engine and models
+    from config import INFERENCE_SERVER
+    from db import SessionLocal
+    from utils.analysis import run_claimed_job
+    from utils.job_queue import claim_next, make_worker_id
+    from utils.inference_client import warmup as warm_models
+
+    if INFERENCE_SERVER:
+        # Models live in the inference server; this process only moves jobs
+        detail = f"inference server={INFERENCE_SERVER}"
+    else:
+        import torch
+        if threads > 0:
+            torch.set_num_threads(threads)
+        if warmup:
+            warm_models()
+        detail = f"torch threads={torch.get_num_threads()}"
+
+    worker_id = make_worker_id(f"worker{index}")
+    print(f"✅ {worker_id} started ({detail})")
+
+    while True:
+        db = SessionLocal()
+        try:
+            entry_id = claim_next(db, worker_id)
+        except Exception:
+            traceback.print_exc()
+            entry_id = None
+        finally:
+            db.close()
+
+        if entry_id is None:
+            time.sleep(poll_interval)
+            continue
+
+        print(f"{worker_id} analyzing entry {entry_id}")
+        run_claimed_job(entry_id, worker_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nexis check-in analysis workers")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")))
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="seconds to sleep when the queue is empty")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per process (default: cores / processes)")
+    parser.add_argument("--no-warmup", action="store_true", help="load models on first job instead of at start")
+    args = parser.parse_args()
+
+    processes = max(1, args.processes)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // processes)
+
+    ctx = multiprocessing.get_context("spawn")
+
+    def start(i):
+        p = ctx.Process(
+            target=_worker_main,
+            args=(i, args.poll_interval, threads, not args.no_warmup),
+            name=f"nexis-worker-{i}",
+        )
+        p.start()
+        return p
+
+    workers = {i: start(i) for i in range(processes)}
+    try:
+        # Supervise: restart any worker that dies (its job is re-claimed after the lease expires)
+        while True:
+            time.sleep(5)
+            for i, p in list(workers.items()):
+                if not p.is_alive():
+                    print(f"⚠️ Worker {i} exited with code {p.exitcode}; restarting")
+                    workers[i] = start(i)
+    except KeyboardInterrupt:
+        for p in workers.values():
+            p.terminate()
+        for p in workers.values():
+            p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import api from "./axios.jsx";
+
+const RECONNECT_MS = 5000;
+
+// Parses one "event: x\ndata: {...}" block of a Server-Sent Events stream
+function parseEvent(block) {
+  let event = "message";
+  let data = "";
+  for (const line of block.split("\n")) {
+    if (line.startsWith("event:")) event = line.slice(6).trim();
+    else if (line.startsWith("data:")) data += line.slice(5).trim();
+  }
+  return { event, data: data ? JSON.parse(data) : null };
+}
+
+/**
+ * Subscribes to /check-in/events (analysis results pushed by the backend).
+ * Uses fetch instead of EventSource so the token goes in the Authorization
+ * header, not the URL. Reconnects after RECONNECT_MS; returns an unsubscribe.
+ */
+export function subscribeToCheckInEvents(token, onEvent) {
+  const controller = new AbortController();
+  let stopped = false;
+
+  const connect = async () => {
+    while (!stopped) {
+      try {
+        const res = await fetch(`${api.defaults.baseURL}/check-in/events`, {
+          headers: { Authorization: `Bearer ${token}` },
+          signal: controller.signal,
+        });
+        if (res.status === 401) return; // logged out; don't hammer the server
+        if (!res.ok || !res.body) throw new Error(`status ${res.status}`);
+
+        const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = "";
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          let split;
+          while ((split = buffer.indexOf("\n\n")) !== -1) {
+            const block = buffer.slice(0, split);
+            buffer = buffer.slice(split + 2);
+            if (block && !block.startsWith(":")) onEvent(parseEvent(block));
+          }
+        }
+      } catch (err) {
+        if (stopped) return;
+        console.error("Check-in event stream dropped:", err);
+      }
+      await new Promise((resolve) => setTimeout(resolve, RECONNECT_MS));
+    }
+  };
+
+  connect();
+  return () => {
+    stopped = true;
+    controller.abort();
+  };
+}
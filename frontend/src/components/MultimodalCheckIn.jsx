@@ -12,6 +12,8 @@ export default function MultimodalCheckIn({ onClose }) {
   const streamRef = useRef(null);
   const mediaRecorderRef = useRef(null);
   const recordedChunksRef = useRef([]);
+  // Chunked upload session: chunks are sent while recording so the server can start decoding
+  const uploadRef = useRef(null);
   const timerIntervalRef = useRef(null);
 
   const [isRecording, setIsRecording] = useState(false);
@@ -49,11 +51,18 @@ export default function MultimodalCheckIn({ onClose }) {
       if (videoRef.current) videoRef.current.srcObject = mediaStream;
 
       recordedChunksRef.current = [];
+      uploadRef.current = await openUploadSession();
       const recorder = new MediaRecorder(mediaStream);
       mediaRecorderRef.current = recorder;
 
       recorder.ondataavailable = (event) => {
-        if (event.data.size > 0) recordedChunksRef.current.push(event.data);
+        if (event.data.size === 0) return;
+        // Kept in memory as well, for the single-request fallback
+        recordedChunksRef.current.push(event.data);
+        const upload = uploadRef.current;
+        if (upload && !upload.failed) {
+          upload.chain = upload.chain.then(() => sendChunk(upload, event.data));
+        }
       };
 
       recorder.onstop = async () => {
@@ -61,14 +70,17 @@ export default function MultimodalCheckIn({ onClose }) {
         setRecordingTime(0);
 
         const videoBlob = new Blob(recordedChunksRef.current, { type: "video/webm" });
+        const upload = uploadRef.current;
 
         // Stop camera immediately — indicator turns off
         stopStream();
         recordedChunksRef.current = [];
         mediaRecorderRef.current = null;
+        uploadRef.current = null;
 
         if (videoBlob.size === 0) {
           setFeedback("Recording was empty. Please try again.");
+          discardUploadSession(upload);
           return;
         }
 
@@ -76,13 +88,17 @@ export default function MultimodalCheckIn({ onClose }) {
         toast("Check-in submitted! Analysis is running in the background.", "success");
         onClose();
 
-        // Fire-and-forget upload (errors are logged but don't affect UX)
-        sendDataToBackend(videoBlob).catch((err) =>
-          console.error("Background check-in upload failed:", err)
-        );
+        // Fire-and-forget upload (errors are logged; a full backlog is reported)
+        submitCheckIn(upload, videoBlob).catch((err) => {
+          console.error("Background check-in upload failed:", err);
+          if (err.response?.status === 429) {
+            toast("The analyzer is busy right now — please try your check-in again in a few minutes.", "error");
+          }
+        });
       };
 
-      recorder.start();
+      // A chunk every 2 seconds keeps the upload just behind the recording
+      recorder.start(uploadRef.current ? 2000 : undefined);
       setIsRecording(true);
       setFeedback("Recording…");
       setRecordingTime(0);
@@ -115,12 +131,85 @@ export default function MultimodalCheckIn({ onClose }) {
       mediaRecorderRef.current = null;
     }
     recordedChunksRef.current = [];
+    discardUploadSession(uploadRef.current);
+    uploadRef.current = null;
     stopStream();
     setIsRecording(false);
     setFeedback("Recording cancelled. Click 'Start Recording' to try again.");
   };
 
-  // Background upload — modal is already closed when this runs
+  const authHeaders = () => ({ Authorization: `Bearer ${auth.token}` });
+
+  // Returns null when the session can't be opened; the recording is then sent in one request
+  const openUploadSession = async () => {
+    if (!auth?.token) return null;
+    try {
+      const res = await api.post(
+        "/check-in/uploads",
+        { filename: "checkin.webm" },
+        { headers: authHeaders() }
+      );
+      return { id: res.data.upload_id, offset: 0, chain: Promise.resolve(), failed: false };
+    } catch (err) {
+      console.error("Could not open upload session:", err);
+      return null;
+    }
+  };
+
+  const sendChunk = async (upload, chunk) => {
+    if (upload.failed) return;
+    try {
+      const res = await api.put(
+        `/check-in/uploads/${upload.id}?offset=${upload.offset}`,
+        chunk,
+        { headers: { ...authHeaders(), "Content-Type": "application/octet-stream" } }
+      );
+      upload.offset = res.data.offset;
+    } catch (err) {
+      console.error("Chunk upload failed, falling back to a single upload:", err);
+      upload.failed = true;
+    }
+  };
+
+  const discardUploadSession = (upload) => {
+    if (!upload || !auth?.token) return;
+    api
+      .delete(`/check-in/uploads/${upload.id}`, { headers: authHeaders() })
+      .catch(() => {});
+  };
+
+  const reportQueue = (data) => {
+    const position = data?.queue_position;
+    if (position > 0) {
+      const minutes = Math.max(1, Math.round((data.eta_seconds || 0) / 60));
+      toast(`Check-in queued (#${position}) — results in about ${minutes} min.`, "info");
+    }
+  };
+
+  // Background submit — modal is already closed when this runs
+  const submitCheckIn = async (upload, videoBlob) => {
+    if (upload) {
+      await upload.chain;
+      if (!upload.failed) {
+        try {
+          const res = await api.post(
+            `/check-in/uploads/${upload.id}/finalize`,
+            { text_input: textInput },
+            { headers: authHeaders() }
+          );
+          reportQueue(res.data);
+          return;
+        } catch (err) {
+          // A full backlog is final; anything else is retried as a plain upload
+          if (err.response?.status === 429) throw err;
+          console.error("Finalizing the chunked upload failed:", err);
+        }
+      }
+      discardUploadSession(upload);
+    }
+    await sendDataToBackend(videoBlob);
+  };
+
   const sendDataToBackend = async (videoBlob) => {
     if (!auth?.token) return;
 
@@ -128,12 +217,38 @@ export default function MultimodalCheckIn({ onClose }) {
     formData.append("video_file", videoBlob, "checkin.webm");
     formData.append("text_input", textInput);
 
-    await api.post("/check-in/multimodal", formData, {
+    const res = await api.post("/check-in/multimodal", formData, {
       headers: {
         Authorization: `Bearer ${auth.token}`,
         "Content-Type": "multipart/form-data",
       },
     });
+
+    reportQueue(res.data);
+  };
+
+  // Text-only check-in: no video upload, result comes back right away
+  const submitTextOnly = async () => {
+    if (!auth?.token || !textInput.trim()) return;
+    setIsUploading(true);
+    try {
+      const res = await api.post(
+        "/check-in/text",
+        { text_input: textInput },
+        { headers: { Authorization: `Bearer ${auth.token}` } }
+      );
+      const emotion = res.data?.emotion;
+      toast(
+        emotion ? `Check-in saved — detected "${emotion}".` : "Check-in saved.",
+        "success"
+      );
+      onClose();
+    } catch (err) {
+      console.error("Text check-in failed:", err);
+      setFeedback("Could not submit your text check-in. Please try again.");
+    } finally {
+      setIsUploading(false);
+    }
   };
 
   const handleClose = () => {
@@ -218,13 +333,24 @@ export default function MultimodalCheckIn({ onClose }) {
 
           {/* Right side */}
           {!isRecording ? (
-            <button
-              onClick={startRecording}
-              className="flex items-center gap-2 bg-green-600 text-white px-6 py-2 rounded-lg text-sm font-semibold shadow hover:bg-green-700 transition-colors"
-            >
-              <span className="w-2 h-2 rounded-full bg-white" />
-              Start Recording
-            </button>
+            <div className="flex items-center gap-3">
+              <button
+                onClick={submitTextOnly}
+                disabled={!textInput.trim() || isUploading}
+                className="text-sm text-indigo-600 hover:text-indigo-800 px-4 py-2 font-medium disabled:text-slate-300"
+                title="Skip the video and analyze your text only"
+              >
+                Send Text Only
+              </button>
+              <button
+                onClick={startRecording}
+                disabled={isUploading}
+                className="flex items-center gap-2 bg-green-600 text-white px-6 py-2 rounded-lg text-sm font-semibold shadow hover:bg-green-700 transition-colors"
+              >
+                <span className="w-2 h-2 rounded-full bg-white" />
+                Start Recording
+              </button>
+            </div>
           ) : (
             <button
               onClick={stopRecording}
@@ -1,6 +1,7 @@
 // src/pages/MoodTracking.jsx
 import api from "../api/axios.jsx";
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
+import { subscribeToCheckInEvents } from "../api/events.jsx";
 import Layout from "../components/Layout";
 import { Line, Pie } from "react-chartjs-2";
 import { ArrowPathIcon, CalendarDaysIcon } from "@heroicons/react/24/outline";
@@ -34,6 +35,25 @@ const moodConfig = {
 };
 
 const RANGE_DAYS = { last7days: 7, last30days: 30 };
+// Only what the list and charts show; skips the probability/text blobs
+const HISTORY_FIELDS = "id,timestamp,emotion,confidence,status,analysis_stage,partial_emotion";
+
+const formatEntry = (entry) => ({
+  id: entry.id,
+  date: new Date(entry.timestamp).toISOString().split("T")[0],
+  mood: entry.emotion
+    ? entry.emotion.charAt(0).toUpperCase() + entry.emotion.slice(1)
+    : null,
+  score: entry.confidence != null ? Math.round(entry.confidence / 10) : null,
+  status: entry.status || "uploaded",
+  // Provisional result while analysis runs (kept out of the charts)
+  provisional: entry.partial_emotion
+    ? {
+        mood: entry.partial_emotion.charAt(0).toUpperCase() + entry.partial_emotion.slice(1),
+        stage: entry.analysis_stage,
+      }
+    : null,
+});
 
 function EmptyChartOverlay({ message }) {
   return (
@@ -50,28 +70,27 @@ export default function MoodTracking() {
   const [loading, setLoading] = useState(true);
   const [analyzingId, setAnalyzingId] = useState(null); // tracks which entry is being analyzed
 
-  const fetchMoodHistory = async () => {
-    setLoading(true);
+  // silent: refresh in place (pushed updates) without the loading skeleton
+  const fetchMoodHistory = async (silent = false) => {
+    if (!silent) setLoading(true);
     try {
       const token = localStorage.getItem("token");
       const days = RANGE_DAYS[dateRange] ?? 7;
-      const res = await api.get("/check-in/history", {
-        headers: { Authorization: `Bearer ${token}` },
-        params: { days },
-      });
+      const from = new Date(Date.now() - days * 24 * 60 * 60 * 1000).toISOString();
 
-      const entries = res.data?.checkins ?? [];
-      const formatted = entries.map((entry) => ({
-        id: entry.id,
-        date: new Date(entry.timestamp).toISOString().split("T")[0],
-        mood: entry.emotion
-          ? entry.emotion.charAt(0).toUpperCase() + entry.emotion.slice(1)
-          : null,
-        score: entry.confidence != null ? Math.round(entry.confidence / 10) : null,
-        status: entry.status || "uploaded",
-      }));
+      // Follow the keyset cursor through every page in the range
+      const entries = [];
+      let cursor = null;
+      do {
+        const res = await api.get("/check-in/history", {
+          headers: { Authorization: `Bearer ${token}` },
+          params: { from, fields: HISTORY_FIELDS, limit: 200, ...(cursor && { cursor }) },
+        });
+        entries.push(...(res.data?.checkins ?? []));
+        cursor = res.data?.next_cursor;
+      } while (cursor);
 
-      setMoodHistory(formatted);
+      setMoodHistory(entries.map(formatEntry));
     } catch (err) {
       console.error("Failed to fetch mood history:", err);
       setMoodHistory([]);
@@ -82,6 +101,35 @@ export default function MoodTracking() {
 
   useEffect(() => { fetchMoodHistory(); }, [dateRange]);
 
+  // Analysis results are pushed by the backend instead of re-polling the history
+  const fetchRef = useRef(fetchMoodHistory);
+  fetchRef.current = fetchMoodHistory;
+  const historyRef = useRef(moodHistory);
+  historyRef.current = moodHistory;
+  useEffect(() => {
+    const token = localStorage.getItem("token");
+    if (!token) return;
+    let connectedOnce = false;
+    return subscribeToCheckInEvents(token, ({ event, data }) => {
+      if (event === "ready") {
+        // Catch up on anything missed while reconnecting
+        if (connectedOnce) fetchRef.current(true);
+        connectedOnce = true;
+      } else if (event === "resync") {
+        fetchRef.current(true);
+      } else if (event === "status" && data) {
+        if (data.refetch || !historyRef.current.some((e) => e.id === data.id)) {
+          // An entry this page hasn't loaded yet, or an event too large to carry the result
+          fetchRef.current(true);
+          return;
+        }
+        setMoodHistory((prev) =>
+          prev.map((e) => (e.id === data.id ? formatEntry({ ...data, timestamp: e.date }) : e))
+        );
+      }
+    });
+  }, []);
+
   const handleAnalyze = async (id) => {
     setAnalyzingId(id);
     try {
@@ -187,7 +235,7 @@ export default function MoodTracking() {
             <option value="last30days">Last 30 Days</option>
           </select>
           <button
-            onClick={fetchMoodHistory}
+            onClick={() => fetchMoodHistory()}
             className="p-2 rounded-lg border border-slate-200 bg-white text-slate-500 hover:text-sky-600 hover:border-sky-300 transition-colors shadow-sm"
             title="Refresh"
           >
@@ -283,6 +331,13 @@ export default function MoodTracking() {
                         >
                           {entry.mood}
                         </span>
+                      ) : entry.provisional ? (
+                        <span
+                          className="px-2.5 py-0.5 rounded-full text-xs font-semibold italic bg-slate-100 text-slate-500"
+                          title={`Provisional — based on ${entry.provisional.stage} so far`}
+                        >
+                          Likely {entry.provisional.mood}…
+                        </span>
                       ) : (
                         <span className="px-2.5 py-0.5 rounded-full text-xs font-semibold bg-slate-100 text-slate-400">
                           Pending